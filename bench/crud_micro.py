@@ -0,0 +1,251 @@
+"""Time every DiscordBotCrud method at several database sizes.
+
+For each size a temporary database is seeded with members, activity, cash,
+inventory and a week of activity buckets. Each method is timed cold and warm
+(repeated calls), and the query plan of every statement it ran is recorded
+with EXPLAIN QUERY PLAN. Cold is the first call on a newly opened sqlite
+connection: the leaderboards and shop catalog are loaded on another one, so
+sqlite's page cache starts empty, but the OS file cache is not dropped.
+Results are printed as a table and can be written as JSON to compare runs:
+
+    python -m bench.crud_micro --sizes 200 5000 50000 --json crud.json
+"""
+import argparse
+import collections
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+
+from bench.write_latency import percentile
+from db.dbcalls import DAY, HOUR, DiscordBotCrud, bucket_start
+
+SHOP_ITEMS = 20
+
+
+def seed(path, members):
+    """Fill a new database directly, much faster than going through the CRUD methods."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        crud = DiscordBotCrud(path)
+    connection = crud.db.connection
+    now = time.time()
+    ids = range(1, members + 1)
+    with connection:
+        connection.executemany("INSERT INTO Members (MemberId, Name) VALUES (?, ?);",
+                               ((member_id, f"member{member_id}") for member_id in ids))
+        connection.executemany(
+            "INSERT INTO UserActivity (MemberId, MessagesSent, XP, MinutesInVC) VALUES (?, ?, ?, ?);",
+            ((member_id, random.randint(0, 5000), random.randint(0, 8000), random.random() * 3000) for member_id in ids))
+        connection.executemany("INSERT INTO Money (MemberId, Cash) VALUES (?, ?);",
+                               ((member_id, random.randint(1000, 100000)) for member_id in ids))
+        connection.executemany("INSERT INTO Income (MemberId) VALUES (?);", ((member_id,) for member_id in ids))
+        connection.executemany(
+            "INSERT INTO Shop (ItemName, ItemPrice, ItemConsumable, RoleAssigned) VALUES (?, ?, ?, ?);",
+            ((f"Item {n}", 100 + n, n % 2, None) for n in range(SHOP_ITEMS)))
+        connection.executemany(
+            "INSERT OR IGNORE INTO Inventory (MemberId, ItemId, Quantity) VALUES (?, ?, ?);",
+            ((random.choice(ids), random.randint(1, SHOP_ITEMS), random.randint(1, 5)) for _ in range(members)))
+        # A week of hourly buckets for a tenth of the members
+        active = random.sample(ids, max(1, members // 10))
+        connection.executemany(
+            "INSERT OR IGNORE INTO ActivityBuckets (BucketStart, BucketSize, MemberId, MessagesSent, MinutesInVC) "
+            "VALUES (?, ?, ?, ?, ?);",
+            ((bucket_start(now - random.randrange(7 * DAY)), HOUR, member_id, random.randint(1, 50), random.random() * 60)
+             for member_id in active for _ in range(20)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        crud.db.close()
+
+
+def cases(members):
+    """(method name, function returning fresh arguments) for every method except close and ensure_table_exists."""
+    member = lambda: random.randint(1, members)
+    item = lambda: f"Item {random.randrange(SHOP_ITEMS)}"
+    fresh = itertools.count(members + 1)
+    everyone = [(member_id, f"member{member_id}") for member_id in range(1, members + 1)]
+
+    # Members and shop items created by the add cases are the ones the remove
+    # and delete cases take away, so the seeded data stays the same size
+    added, items_added, new_items = collections.deque(), collections.deque(), itertools.count()
+
+    def new_member():
+        added.append(next(fresh))
+        return (added[-1],)
+
+    def new_shop_item():
+        items_added.append(f"Bench item {next(new_items)}")
+        return (items_added[-1], 100, True, None)
+
+    def voice_tick():
+        in_voice = random.sample(range(1, members + 1), min(20, members))
+        now = time.time()
+        return ([(member_id, 1.0, 2) for member_id in in_voice], now,
+                [(member_id, 1, now) for member_id in in_voice[:2]], in_voice[-2:])
+
+    def voice_reconcile():
+        in_voice = random.sample(range(1, members + 1), min(20, members))
+        now = time.time()
+        return ([(member_id, 1, now - 600, now) for member_id in in_voice],)
+
+    def sync():
+        # Every seeded member but one, so each call marks one departure and re-adds the previous one
+        # (the first call also marks the members created by add_members as departed)
+        present = list(everyone)
+        del present[random.randrange(len(present))]
+        return (present,)
+
+    return [
+        ("load_rankings", lambda: ()),
+        ("load_catalog", lambda: ()),
+        ("get_member", lambda: (member(),)),
+        ("get_user_activity", lambda: (member(),)),
+        ("get_cash", lambda: (member(),)),
+        ("get_rank", lambda: (member(), "XP")),
+        ("get_member_names", lambda: ([member() for _ in range(9)],)),
+        ("get_inventory", lambda: (member(),)),
+        ("get_lastclaimtime", lambda: (member(), "daily")),
+        ("get_shop_items", lambda: ()),
+        ("get_shop_item", lambda: (item(),)),
+        ("get_top_xp", lambda: ()),
+        ("get_top_cash", lambda: ()),
+        ("get_top_chat_users", lambda: ()),
+        ("get_top_voice_users", lambda: ()),
+        ("get_top_activity", lambda: ("MessagesSent", 1)),
+        ("get_top_all_time", lambda: ("MessagesSent",)),
+        ("get_voice_sessions", lambda: ()),
+        ("increment_messages_sent", lambda: (member(),)),
+        ("apply_activity_deltas", lambda: ([(member(), 3, 3, "2026-01-01 00:00:00") for _ in range(50)],)),
+        ("add_voice_time", lambda: (member(), 5.0, 10)),
+        ("credit_voice_sessions", voice_tick),
+        ("reconcile_voice_sessions", voice_reconcile),
+        ("add_xp", lambda: (member(), 10)),
+        ("remove_xp", lambda: (member(), 1)),
+        ("update_xp", lambda: (member(), random.randint(0, 8000))),
+        ("add_cash", lambda: (member(), 10)),
+        ("remove_cash", lambda: (member(), 10)),
+        ("reset_cash", lambda: (member(), random.randint(1000, 100000))),
+        ("debit_cash", lambda: (member(), 10, "bench")),
+        ("settle_bet", lambda: (member(), 100, random.choice([0, 200]), "bench")),
+        ("purchase_item", lambda: (member(), item())),
+        ("add_inventory_item", lambda: (member(), item())),
+        ("use_inventory_item", lambda: (member(), item())),
+        ("update_lastclaimtime", lambda: (member(), "daily", "2026-01-01T00:00:00")),
+        ("add_shop_item", new_shop_item),
+        ("delete_shop_item", lambda: (items_added.popleft() if items_added else item(),)),
+        ("set_member_names", lambda: ({member(): f"renamed{n}" for n in range(10)},)),
+        ("add_members", lambda: ([(next(fresh), None) for _ in range(50)],)),
+        ("add_member", new_member),
+        ("remove_member", lambda: (added.popleft() if added else next(fresh),)),
+        ("mark_members_left", lambda: ([member()],)),
+        ("sync_members", sync),
+        ("rollup_activity", lambda: ()),
+        ("checkpoint", lambda: ()),
+    ]
+
+
+def query_plans(path, statements):
+    """EXPLAIN QUERY PLAN for each distinct statement, on a separate connection."""
+    connection = sqlite3.connect(path)
+    plans = []
+    try:
+        for statement in dict.fromkeys(statements):
+            verb = statement.lstrip().split(None, 1)[0].upper()
+            if verb not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE"):
+                continue
+            try:
+                rows = connection.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+                plans.append({"sql": " ".join(statement.split()), "plan": [row[-1] for row in rows]})
+            except sqlite3.Error as e:
+                plans.append({"sql": " ".join(statement.split()), "error": str(e)})
+    finally:
+        connection.close()
+    return plans
+
+
+def call(crud, name, args):
+    try:
+        getattr(crud, name)(*args)
+    except ValueError:
+        pass  # use_inventory_item raises when the member doesn't own the item
+
+
+def run_size(members, repeat, only=None):
+    path = os.path.join(tempfile.mkdtemp(prefix="eli_micro_"), "micro.db")
+    start = time.perf_counter()
+    seed(path, members)
+    seeded = time.perf_counter() - start
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, make_args in cases(members):
+            if only and name not in only:
+                continue
+            # A fresh connection per method, reopened after the startup loads so the first call is cold
+            crud = DiscordBotCrud(path)
+            crud.db.close()
+            crud.db.connect()
+            statements = []
+            crud.db.connection.set_trace_callback(statements.append)
+
+            start = time.perf_counter()
+            call(crud, name, make_args())
+            cold = (time.perf_counter() - start) * 1000
+            traced = list(statements)
+            crud.db.connection.set_trace_callback(None)
+
+            warm = []
+            for _ in range(repeat):
+                args = make_args()
+                start = time.perf_counter()
+                call(crud, name, args)
+                warm.append((time.perf_counter() - start) * 1000)
+            crud.db.close()
+
+            results[name] = {
+                "cold_ms": round(cold, 4),
+                "warm_p50_ms": round(percentile(warm, 50), 4),
+                "warm_p95_ms": round(percentile(warm, 95), 4),
+                "warm_calls": repeat,
+                "statements": len(traced),
+                "plans": query_plans(path, traced),
+            }
+    return {"seed_seconds": round(seeded, 3), "methods": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 5000, 50000], help="Member counts to seed")
+    parser.add_argument("--repeat", type=int, default=200, help="Warm calls per method")
+    parser.add_argument("--method", action="append", help="Only time these methods (repeatable)")
+    parser.add_argument("--json", help="Write the full results, with query plans, to this file")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    report = {
+        "sqlite": sqlite3.sqlite_version,
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    for members in args.sizes:
+        random.seed(args.seed)
+        result = report["sizes"][members] = run_size(members, args.repeat, args.method)
+        print(f"\n{members} members (seeded in {result['seed_seconds']}s)")
+        for name, timing in result["methods"].items():
+            scans = sum(1 for plan in timing["plans"] for step in plan.get("plan", []) if step.startswith("SCAN"))
+            print(f"{name:>24}: cold={timing['cold_ms']:8.3f}ms warm p50={timing['warm_p50_ms']:8.3f}ms "
+                  f"p95={timing['warm_p95_ms']:8.3f}ms statements={timing['statements']} scans={scans}")
+
+    if args.json:
+        with open(args.json, "w") as stream:
+            json.dump(report, stream, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""Load-test the bot's event handlers and commands against a temporary database.
+
+Drives the real handlers in bot.py and the loaded cogs with stand-in Discord
+objects: messages, voice joins and leaves, member joins and economy commands.
+Events come from a synthetic mix or a recorded JSONL stream. Anything that
+would reach Discord (sends, edits) is answered locally after --http-ms, so the
+numbers reflect the bot's own work and the database. Run from the repo root:
+
+    python -m bench.event_replay --events 20000 --members 2000
+    python -m bench.event_replay --record events.jsonl --events 5000
+    python -m bench.event_replay --replay events.jsonl
+
+Each JSONL line is one event:
+
+    {"type": "message", "member": 12, "content": "hello"}
+    {"type": "voice", "member": 12, "channel": 3}          (channel null = leave)
+    {"type": "join", "member": 12, "name": "someone"}
+    {"type": "command", "member": 12, "name": "slots", "args": [100, "x5"]}
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from bench.write_latency import percentile
+
+# bot.py reads these at import; the harness never connects to Discord
+os.environ.setdefault("TOKEN", "event-replay")
+os.environ.setdefault("CONSOLE", "0")
+
+COMMAND_MIX = [
+    ("slots", lambda: [random.choice([100, 200, 500]), random.choice(["x1", "x5", "x10"])]),
+    ("roulette", lambda: [random.choice([100, 500]), random.choice(["red", "black", "odd"]), str(random.randint(0, 36))]),
+    ("blackjack", lambda: [random.choice([100, 500, 1000])]),
+    ("buy", lambda: ["Bench Item"]),
+    ("collect", lambda: []),
+    ("stats", lambda: []),
+]
+
+
+class FakeHTTP:
+    """Answers every Discord call after a fixed delay and counts them."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = Counter()
+
+    async def request(self, route):
+        self.calls[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeAsset:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class FakeRole:
+    position = 0
+
+
+class FakeMessage:
+    _next_id = 1
+
+    def __init__(self, http, author=None, content="", channel=None, guild=None):
+        self.id = FakeMessage._next_id
+        FakeMessage._next_id += 1
+        self._http = http
+        self._state = None
+        self.author = author
+        self.content = content
+        self.channel = channel
+        self.guild = guild
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.edited_at = None
+
+    async def edit(self, **kwargs):
+        await self._http.request("edit_message")
+        return self
+
+
+class FakeChannel:
+    def __init__(self, http, channel_id, guild=None):
+        self._http = http
+        self.id = channel_id
+        self.guild = guild
+        self.members = []
+
+    async def send(self, content=None, **kwargs):
+        await self._http.request("send_message")
+        return FakeMessage(self._http, content=content or "", channel=self, guild=self.guild)
+
+
+class FakeGuild:
+    def __init__(self, http):
+        self.id = 1
+        self.shard_id = 0
+        self.chunked = True
+        self.members = []
+        self.voice_channels = [FakeChannel(http, channel_id, self) for channel_id in range(1, 6)]
+        self.me = None
+        self.roles = []
+
+    def get_channel(self, channel_id):
+        return None
+
+    def get_member(self, member_id):
+        return None
+
+
+class FakePermissions:
+    administrator = False
+    manage_roles = False
+
+
+class FakeMember:
+    def __init__(self, member_id, name, guild):
+        self.id = member_id
+        self.name = self.display_name = name
+        self.mention = f"<@{member_id}>"
+        self.bot = False
+        self.guild = guild
+        self.avatar = self.display_avatar = FakeAsset()
+        self.guild_permissions = FakePermissions()
+        self.roles = []
+        self.top_role = FakeRole()
+
+
+class FakeVoiceState:
+    def __init__(self, channel):
+        self.channel = channel
+
+
+class FakeContext:
+    """What the commands use from commands.Context."""
+
+    def __init__(self, bot, author, channel):
+        self.bot = bot
+        self.author = author
+        self.channel = channel
+        self.guild = author.guild
+        self.message = FakeMessage(channel._http, author, "", channel, author.guild)
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+def synthetic_events(count, members, mix):
+    """A stream weighted like a busy server: mostly chat, some voice, a few joins and commands."""
+    in_voice = set()
+    next_member = members
+    for _ in range(count):
+        roll = random.random()
+        member_id = random.randrange(members)
+        if roll < mix["message"]:
+            yield {"type": "message", "member": member_id, "content": f"message {random.random():.6f}"}
+        elif roll < mix["message"] + mix["voice"]:
+            if member_id in in_voice:
+                in_voice.discard(member_id)
+                yield {"type": "voice", "member": member_id, "channel": None}
+            else:
+                in_voice.add(member_id)
+                yield {"type": "voice", "member": member_id, "channel": random.randint(1, 5)}
+        elif roll < mix["message"] + mix["voice"] + mix["join"]:
+            yield {"type": "join", "member": next_member, "name": f"member{next_member}"}
+            next_member += 1
+        else:
+            name, args = random.choice(COMMAND_MIX)
+            yield {"type": "command", "member": member_id, "name": name, "args": args()}
+
+
+class Harness:
+    def __init__(self, bot_module, http, guild):
+        self.botmod = bot_module
+        self.bot = bot_module.bot
+        self.http = http
+        self.guild = guild
+        self.text_channel = FakeChannel(http, 100, guild)
+        self.voice = {channel.id: channel for channel in guild.voice_channels}
+        self.members = {}
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+
+    def member(self, member_id, name=None):
+        member = self.members.get(member_id)
+        if member is None:
+            member = self.members[member_id] = FakeMember(member_id, name or f"member{member_id}", self.guild)
+        return member
+
+    def current_channel(self, member):
+        for channel in self.voice.values():
+            if member in channel.members:
+                return channel
+        return None
+
+    async def handle(self, event):
+        kind = event["type"]
+        member = self.member(event["member"], event.get("name"))
+
+        if kind == "message":
+            message = FakeMessage(self.http, member, event["content"], self.text_channel, self.guild)
+            await self.botmod.on_message(message)
+            return "on_message"
+
+        if kind == "voice":
+            before = self.current_channel(member)
+            after = self.voice.get(event["channel"]) if event["channel"] is not None else None
+            if before:
+                before.members.remove(member)
+            if after:
+                after.members.append(member)
+            await self.bot.get_cog("VoiceTracking").on_voice_state_update(
+                member, FakeVoiceState(before), FakeVoiceState(after))
+            return "on_voice_state_update"
+
+        if kind == "join":
+            await self.botmod.on_member_join(member)
+            return "on_member_join"
+
+        # Commands skip checks and cooldowns so every event does the command's work
+        command = self.bot.get_command(event["name"])
+        await command(FakeContext(self.bot, member, self.text_channel), *event.get("args", []))
+        return f"+{event['name']}"
+
+    async def timed(self, event, limiter):
+        async with limiter:
+            start = time.perf_counter()
+            try:
+                name = await self.handle(event)
+            except Exception as e:
+                name = event.get("name") and f"+{event['name']}" or event["type"]
+                self.errors[f"{name}: {type(e).__name__}"] += 1
+            self.latencies[name].append((time.perf_counter() - start) * 1000)
+
+
+async def seed(bot, members, cash):
+    """Give the seeded members rows, starting cash and something to buy."""
+    await bot.db.add_members([(member_id, f"member{member_id}") for member_id in range(members)])
+
+    def fund(crud):
+        with crud.db.connection:
+            crud.db.connection.execute("UPDATE Money SET Cash = ?;", (cash,))
+        crud.load_rankings()
+        crud.add_shop_item("Bench Item", 50, True, None)
+    await bot.db.run(fund, bot.db.crud)
+
+
+async def count_writes(bot, counts):
+    """Count write statements and commits on the database thread."""
+    def install(connection):
+        def trace(statement):
+            verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+            if verb in ("INSERT", "UPDATE", "DELETE", "REPLACE"):
+                counts["write statements"] += 1
+            elif verb in ("COMMIT", "END"):
+                counts["commits"] += 1
+        connection.set_trace_callback(trace)
+    await bot.db.run(install, bot.db.crud.db.connection)
+
+
+async def run(args):
+    import bot as bot_module
+
+    async with bot_module.bot:
+        await replay(bot_module, args)
+
+
+async def replay(bot_module, args):
+    http = FakeHTTP(args.http_ms / 1000)
+    guild = FakeGuild(http)
+    bot = bot_module.bot
+    bot._connection.user = FakeMember(0, "eli_bot", guild)  # process_commands compares authors to the bot user
+
+    path = os.path.join(tempfile.mkdtemp(prefix="eli_replay_"), "replay.db")
+    bot.db.db_name = path
+    with contextlib.redirect_stdout(io.StringIO()):
+        await bot.db.start()
+        await bot_module.Load()
+    await seed(bot, args.members, args.cash)
+
+    if args.replay:
+        with open(args.replay) as stream:
+            events = [json.loads(line) for line in stream if line.strip()]
+    else:
+        mix = {"message": args.message_share, "voice": args.voice_share, "join": args.join_share}
+        events = list(synthetic_events(args.events, args.members, mix))
+    if args.record:
+        with open(args.record, "w") as stream:
+            stream.writelines(json.dumps(event) + "\n" for event in events)
+
+    harness = Harness(bot_module, http, guild)
+    writes = Counter()
+    await count_writes(bot, writes)
+    changes_before = await bot.db.run(lambda: bot.db.crud.db.connection.total_changes)
+
+    bot_module.flush_activity.start()
+    bot_module.flush_joins.start()
+    limiter = asyncio.Semaphore(args.concurrency)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(harness.timed(event, limiter) for event in events))
+        # Count the buffered writes this load caused, not just the ones that happened to flush
+        await bot_module.activity_buffer.flush()
+        await bot_module.join_queue.flush()
+    elapsed = time.perf_counter() - start
+    bot_module.flush_activity.cancel()
+    bot_module.flush_joins.cancel()
+
+    changes = await bot.db.run(lambda: bot.db.crud.db.connection.total_changes) - changes_before
+
+    print(f"{len(events)} events in {elapsed:.2f}s: {len(events) / elapsed:,.0f} events/s "
+          f"(concurrency {args.concurrency}, simulated HTTP {args.http_ms}ms)")
+    print(f"database: {writes['write statements']} write statements, {writes['commits']} commits, "
+          f"{changes} rows changed ({changes / len(events):.2f} per event)")
+    print(f"discord calls: {dict(http.calls)}")
+    for name, samples in sorted(harness.latencies.items()):
+        print(f"{name:>24}: n={len(samples)} mean={statistics.mean(samples):.2f}ms "
+              f"p50={percentile(samples, 50):.2f}ms p95={percentile(samples, 95):.2f}ms "
+              f"p99={percentile(samples, 99):.2f}ms max={max(samples):.2f}ms")
+    for error, count in harness.errors.most_common():
+        print(f"error: {error} x{count}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for extension in list(bot.extensions):
+            await bot.unload_extension(extension)
+        await bot.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10000, help="Synthetic events to generate")
+    parser.add_argument("--members", type=int, default=2000, help="Members seeded in the database")
+    parser.add_argument("--cash", type=int, default=100000, help="Starting cash for seeded members")
+    parser.add_argument("--concurrency", type=int, default=50, help="Events handled at once")
+    parser.add_argument("--http-ms", type=float, default=0.0, help="Simulated Discord API latency")
+    parser.add_argument("--message-share", type=float, default=0.85)
+    parser.add_argument("--voice-share", type=float, default=0.06)
+    parser.add_argument("--join-share", type=float, default=0.02)
+    parser.add_argument("--replay", help="Replay events from this JSONL file instead of generating them")
+    parser.add_argument("--record", help="Also write the events to this JSONL file")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
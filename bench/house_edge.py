@@ -0,0 +1,194 @@
+"""Estimate the house edge of slots, roulette and blackjack by Monte Carlo.
+
+Outcomes come from the same rules the bot uses (SlotsGame, RouletteGame and
+games.blackjack). With NumPy installed the draws are batched; without it the
+games are played one round at a time, which is much slower. Every number is
+per unit bet: an EV of -0.05 means the player loses 5% of what they stake.
+Run from the repo root:
+
+    python -m bench.house_edge --rounds 2000000 --bankroll 20
+"""
+import argparse
+import math
+import random
+import time
+
+from cogs.gambling import SLOTS_WIN_CHANCE, RouletteGame, SlotsGame
+from games.blackjack import CARD_VALUES, DEALER_STANDS_ON, VALUES, BlackjackGame, FINISHED, Shoe
+
+try:
+    import numpy as np
+except ImportError:  # Optional: fall back to playing rounds one at a time
+    np = None
+
+ROULETTE_SPACES = ["red", "black", "odd", "even", "17"]
+
+
+# Each simulator returns the player's net result per unit bet for n rounds.
+
+def slots_rounds(n, rng):
+    game = SlotsGame(None)
+    pays = game.calculate_winnings(1, [game.symbols[0]] * 3)
+    if np is None:
+        return [game.calculate_winnings(1, game.spin()) - 1 for _ in range(n)]
+
+    forced = rng.random(n) < SLOTS_WIN_CHANCE
+    symbols = rng.integers(0, len(game.symbols), size=(n, 3))
+    triple = (symbols[:, 0] == symbols[:, 1]) & (symbols[:, 1] == symbols[:, 2])
+    return np.where(forced | triple, pays, 0) - 1
+
+
+def roulette_rounds(space):
+    def simulate(n, rng):
+        game = RouletteGame(None)
+        results = list(game.slots)
+        pays = game.multiplier(space)
+        if np is None:
+            return [game.is_win(space, random.choice(results)) * pays - 1 for _ in range(n)]
+
+        # Payout for every pocket, then look the spins up in it
+        table = np.array([game.is_win(space, result) * pays for result in results])
+        return table[rng.integers(0, len(results), size=n)] - 1
+    return simulate
+
+
+def _hand_values(totals, aces):
+    """Vectorized games.blackjack.hand_value: count aces as 1 where 11 would bust."""
+    soft = np.clip(np.ceil((totals - 21) / 10), 0, aces)
+    return totals - 10 * soft
+
+
+def blackjack_rounds(stand_on):
+    def simulate(n, rng):
+        if np is None:
+            shoe = Shoe(rng=random)
+            outcomes = []
+            for _ in range(n):
+                game = BlackjackGame(0, 1, shoe)
+                while game.state != FINISHED:
+                    if game.player_value < stand_on:
+                        game.hit()
+                    else:
+                        game.stand()
+                outcomes.append(game.payout - 1)
+            return outcomes
+
+        # Cards are drawn with replacement here: a close match for a six-deck shoe
+        ranks = np.array([CARD_VALUES[value] for value in VALUES])
+
+        def draw(size):
+            cards = ranks[rng.integers(0, len(ranks), size=size)]
+            return cards, (cards == 11).astype(np.int64)
+
+        def deal():
+            first, first_aces = draw(n)
+            second, second_aces = draw(n)
+            return first + second, first_aces + second_aces
+
+        player, player_aces = deal()
+        dealer, dealer_aces = deal()
+
+        # The player draws to stand_on, or until 21 where the game stands for them
+        while True:
+            value = _hand_values(player, player_aces)
+            drawing = (value < stand_on) & (value < 21)
+            if not drawing.any():
+                break
+            cards, aces = draw(n)
+            player += np.where(drawing, cards, 0)
+            player_aces += np.where(drawing, aces, 0)
+        player_value = _hand_values(player, player_aces)
+
+        while True:
+            value = _hand_values(dealer, dealer_aces)
+            drawing = value < DEALER_STANDS_ON
+            if not drawing.any():
+                break
+            cards, aces = draw(n)
+            dealer += np.where(drawing, cards, 0)
+            dealer_aces += np.where(drawing, aces, 0)
+        dealer_value = _hand_values(dealer, dealer_aces)
+
+        payout = np.select(
+            [player_value > 21, dealer_value > 21, dealer_value > player_value, dealer_value < player_value],
+            [0, 2, 0, 2],
+            default=1,
+        )
+        return payout - 1
+    return simulate
+
+
+def summarize(outcomes):
+    if np is not None:
+        return float(outcomes.mean()), float(outcomes.var())
+    mean = sum(outcomes) / len(outcomes)
+    return mean, sum((x - mean) ** 2 for x in outcomes) / len(outcomes)
+
+
+def ruin_curve(simulate, rng, bankroll, sessions, rounds, checkpoints):
+    """Fraction of sessions that can no longer cover a bet by each checkpoint round."""
+    outcomes = simulate(sessions * rounds, rng)
+    if np is not None:
+        balance = bankroll + np.cumsum(np.asarray(outcomes).reshape(sessions, rounds), axis=1)
+        ruined = np.maximum.accumulate(balance < 1, axis=1)
+        return [float(ruined[:, checkpoint - 1].mean()) for checkpoint in checkpoints]
+
+    ruined_at = []
+    for session in range(sessions):
+        balance = bankroll
+        for round_number, result in enumerate(outcomes[session * rounds:(session + 1) * rounds], 1):
+            balance += result
+            if balance < 1:
+                ruined_at.append(round_number)
+                break
+    return [sum(1 for r in ruined_at if r <= checkpoint) / sessions for checkpoint in checkpoints]
+
+
+def run_game(name, simulate, args, rng):
+    start = time.perf_counter()
+    outcomes = simulate(args.rounds, rng)
+    elapsed = time.perf_counter() - start
+    ev, variance = summarize(outcomes)
+    margin = 1.96 * math.sqrt(variance / args.rounds)
+
+    checkpoints = sorted({max(1, args.session_rounds * pct // 100) for pct in (10, 25, 50, 100)})
+    ruin = ruin_curve(simulate, rng, args.bankroll, args.sessions, args.session_rounds, checkpoints)
+    curve = " ".join(f"{checkpoint}:{fraction:.1%}" for checkpoint, fraction in zip(checkpoints, ruin))
+
+    print(
+        f"{name:>16}: EV={ev:+.4f} ±{margin:.4f} var={variance:.3f} "
+        f"rounds/s={args.rounds / elapsed:,.0f} ruin({args.bankroll}u)={curve}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=1_000_000, help="Rounds per game for EV and variance")
+    parser.add_argument("--bankroll", type=int, default=20, help="Starting bankroll for ruin curves, in bets")
+    parser.add_argument("--sessions", type=int, default=2000, help="Sessions per ruin curve")
+    parser.add_argument("--session-rounds", type=int, default=500, help="Rounds per ruin session")
+    parser.add_argument("--stand-on", type=int, default=DEALER_STANDS_ON, help="Blackjack player hits below this value")
+    parser.add_argument("--game", choices=["slots", "roulette", "blackjack"], action="append",
+                        help="Game to simulate (repeatable, default: all)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if np is None:
+        print("NumPy not installed; playing rounds one at a time (use fewer --rounds).")
+        random.seed(args.seed)
+        rng = random
+    else:
+        rng = np.random.default_rng(args.seed)
+
+    games = args.game or ["slots", "roulette", "blackjack"]
+    if "slots" in games:
+        run_game("slots", slots_rounds, args, rng)
+    if "roulette" in games:
+        for space in ROULETTE_SPACES:
+            run_game(f"roulette {space}", roulette_rounds(space), args, rng)
+    if "blackjack" in games:
+        run_game(f"blackjack <{args.stand_on}", blackjack_rounds(args.stand_on), args, rng)
+
+
+if __name__ == "__main__":
+    main()
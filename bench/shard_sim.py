@@ -0,0 +1,204 @@
+"""Simulate a sharded deployment locally with fake guilds and events.
+
+Starts a database writer on a temporary database and several shard-group
+processes, each running the real bot (as an AutoShardedBot with its own
+SHARD_IDS) with one stand-in guild per shard. Every group replays synthetic
+events through the real handlers, as bench.event_replay does, with all writes
+going to the shared writer. Afterwards the database is checked: every message
+from every shard must be counted exactly once. Run from the repo root:
+
+    python -m bench.shard_sim --shards 4 --processes 2 --events 5000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import secrets
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from bench.write_latency import percentile
+from db.writer import RemoteCrud
+from launcher import ROOT, group_env, shard_groups, start_writer, stop, wait_for_writer
+
+MEMBER_BASE = 10_000_000  # Shard n's members are (n + 1) * MEMBER_BASE + i, so no two shards share one
+
+
+def shard_members(shard_id, members):
+    return [(shard_id + 1) * MEMBER_BASE + i for i in range(members)]
+
+
+def free_address():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{probe.getsockname()[1]}"
+
+
+async def worker(args):
+    """One shard-group process: replay events for each of its shards."""
+    from bench.event_replay import FakeGuild, FakeHTTP, FakeMember, Harness, synthetic_events
+    import bot as bot_module
+
+    bot = bot_module.bot
+    shard_ids = bot.shard_ids or [0]
+    http = FakeHTTP(args.http_ms / 1000)
+
+    async with bot:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await bot.db.start()
+            await bot_module.Load()
+
+        harnesses, streams, expected = {}, [], Counter()
+        for shard_id in shard_ids:
+            guild = FakeGuild(http)
+            guild.id, guild.shard_id = shard_id + 1, shard_id
+            harnesses[shard_id] = Harness(bot_module, http, guild)
+            random.seed(args.seed * 1000 + shard_id)
+            mix = {"message": args.message_share, "voice": args.voice_share, "join": args.join_share}
+            events = []
+            for event in synthetic_events(args.events, args.members, mix):
+                event["member"] += (shard_id + 1) * MEMBER_BASE
+                expected[shard_id] += event["type"] == "message"
+                events.append((shard_id, event))
+            streams.append(events)
+        bot._connection.user = FakeMember(0, "eli_bot", harnesses[shard_ids[0]].guild)
+
+        # Interleave the shards' events, the way they would arrive on one loop
+        events = [event for batch in zip(*streams) for event in batch]
+        limiter = asyncio.Semaphore(args.concurrency)
+        bot_module.flush_activity.start()
+        bot_module.flush_joins.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.gather(*(harnesses[shard_id].timed(event, limiter) for shard_id, event in events))
+            await bot_module.activity_buffer.flush()
+            await bot_module.join_queue.flush()
+        elapsed = time.perf_counter() - start
+        bot_module.flush_activity.cancel()
+        bot_module.flush_joins.cancel()
+
+        queries = [ms for window in bot.perf.stats["query"].values() for ms in window.samples]
+        errors = sum((harness.errors for harness in harnesses.values()), Counter())
+        result = {
+            "shards": shard_ids,
+            "events": len(events),
+            "seconds": elapsed,
+            "expected_messages": {str(shard_id): count for shard_id, count in expected.items()},
+            "counted_messages": {str(shard_id): bot.shard_stats.counts[shard_id]["messages"] for shard_id in shard_ids},
+            "writer_calls": sum(window.count for window in bot.perf.stats["query"].values()),
+            "writer_p50_ms": percentile(queries, 50) if queries else 0.0,
+            "writer_p95_ms": percentile(queries, 95) if queries else 0.0,
+            "errors": dict(errors),
+        }
+        with contextlib.redirect_stdout(io.StringIO()):
+            for extension in list(bot.extensions):
+                await bot.unload_extension(extension)
+            await bot.db.close()
+    print(json.dumps(result))
+
+
+def seed(address, key, shards, members, cash):
+    crud = RemoteCrud(address, key)
+    try:
+        for shard_id in range(shards):
+            ids = shard_members(shard_id, members)
+            crud.add_members([(member_id, f"member{member_id}") for member_id in ids])
+            for member_id in ids:
+                crud.add_cash(member_id, cash, "bench")
+        crud.add_shop_item("Bench Item", 50, True, None)
+    finally:
+        crud.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=2, help="Shard-group processes")
+    parser.add_argument("--events", type=int, default=5000, help="Synthetic events per shard")
+    parser.add_argument("--members", type=int, default=500, help="Members per shard")
+    parser.add_argument("--cash", type=int, default=100000, help="Starting cash for seeded members")
+    parser.add_argument("--concurrency", type=int, default=50, help="Events handled at once per process")
+    parser.add_argument("--http-ms", type=float, default=0.0, help="Simulated Discord API latency")
+    parser.add_argument("--message-share", type=float, default=0.85)
+    parser.add_argument("--voice-share", type=float, default=0.06)
+    parser.add_argument("--join-share", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        asyncio.run(worker(args))
+        return
+
+    directory = tempfile.mkdtemp(prefix="eli_shards_")
+    db_name = os.path.join(directory, "shards.db")
+    address = free_address()
+    key = secrets.token_hex(16)
+    env = dict(os.environ, DB_WRITER_KEY=key, TOKEN="shard-sim", CONSOLE="0",
+               LOG_FILE=os.path.join(directory, "bot.log"))
+    env.pop("METRICS_PORT", None)
+
+    writer = start_writer(address, db_name, dict(env, LOG_FILE=os.path.join(directory, "writer.log"), LOG_LEVEL="WARNING"))
+    try:
+        wait_for_writer(address, key.encode(), writer)
+        start = time.perf_counter()
+        seed(address, key.encode(), args.shards, args.members, args.cash)
+        print(f"Seeded {args.shards} x {args.members} members through the writer in {time.perf_counter() - start:.2f}s")
+
+        command = [sys.executable, "-m", "bench.shard_sim", "--worker", *sys.argv[1:]]
+        groups = shard_groups(args.shards, args.processes)
+        start = time.perf_counter()
+        workers = [subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True,
+                                    env=group_env(env, args.shards, group, index, address))
+                   for index, group in enumerate(groups)]
+        results = []
+        for process in workers:
+            output, _ = process.communicate()
+            if process.returncode:
+                raise RuntimeError(f"Shard group exited with code {process.returncode}")
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        wall = time.perf_counter() - start
+    finally:
+        stop([writer])
+
+    total_events = sum(result["events"] for result in results)
+    for index, result in enumerate(results):
+        counted = sum(result["counted_messages"].values())
+        print(f"group {index} shards {result['shards']}: {result['events']} events in {result['seconds']:.2f}s "
+              f"({result['events'] / result['seconds']:,.0f}/s), {counted} messages, "
+              f"{result['writer_calls']} writer calls p50={result['writer_p50_ms']:.2f}ms p95={result['writer_p95_ms']:.2f}ms")
+        for error, count in result["errors"].items():
+            print(f"  error: {error} x{count}")
+    print(f"{total_events} events across {args.shards} shards in {len(results)} processes: "
+          f"{total_events / wall:,.0f} events/s wall clock (including process startup)")
+
+    # Every message from every shard must have been written exactly once
+    expected = Counter()
+    for result in results:
+        expected.update({int(shard_id): count for shard_id, count in result["expected_messages"].items()})
+    connection = sqlite3.connect(db_name)
+    try:
+        ok = True
+        for shard_id in range(args.shards):
+            ids = shard_members(shard_id, args.members)
+            low, high = ids[0], (shard_id + 2) * MEMBER_BASE
+            stored = connection.execute("SELECT COALESCE(SUM(MessagesSent), 0) FROM UserActivity "
+                                        "WHERE MemberId >= ? AND MemberId < ?;", (low, high)).fetchone()[0]
+            ok &= stored == expected[shard_id]
+            print(f"shard {shard_id}: {expected[shard_id]} messages sent, {stored} stored")
+    finally:
+        connection.close()
+    print("consistent" if ok else "MISMATCH: some messages were lost or double counted")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Measure write latency under the old and new sqlite pragma profiles.
+
+Seeds a temporary database, then times single-message writes (one statement
+plus commit each, the pre-buffering worst case) while a second thread keeps
+running the leaderboard queries. Run from the repo root:
+
+    python -m bench.write_latency --members 5000 --writes 5000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from db.dbcalls import DiscordBotCrud
+
+# What DiscordBotDatabase.connect used before the pragma profile was added
+LEGACY_PROFILE = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "mmap_size": 0,
+    "cache_size": -2000,
+    "temp_store": "DEFAULT",
+    "busy_timeout": 5000,
+}
+
+PROFILES = {
+    "legacy": LEGACY_PROFILE,
+    "default": {},
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def seed(crud, members):
+    with crud.db.connection:
+        crud.db.connection.executemany(
+            "INSERT OR IGNORE INTO UserActivity (MemberId, MessagesSent, XP) VALUES (?, ?, ?)",
+            [(member_id, random.randint(0, 5000), random.randint(0, 5000)) for member_id in range(members)],
+        )
+
+
+def run_profile(name, pragmas, members, writes):
+    path = os.path.join(tempfile.mkdtemp(prefix="eli_bench_"), "bench.db")
+    crud = DiscordBotCrud(path, pragmas)
+    seed(crud, members)
+
+    # Readers use their own connection, like a second process would
+    stop = threading.Event()
+
+    def reader():
+        reader_crud = DiscordBotCrud(path, pragmas)
+        while not stop.is_set():
+            reader_crud.get_top_chat_users()
+            reader_crud.get_top_xp()
+        reader_crud.db.close()
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+
+    latencies = []
+    for _ in range(writes):
+        member_id = random.randrange(members)
+        start = time.perf_counter()
+        crud.increment_messages_sent(member_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    stop.set()
+    thread.join()
+    crud.db.close()
+
+    print(
+        f"{name:>8}: writes={writes} "
+        f"mean={statistics.mean(latencies):.3f}ms "
+        f"p50={percentile(latencies, 50):.3f}ms "
+        f"p95={percentile(latencies, 95):.3f}ms "
+        f"p99={percentile(latencies, 99):.3f}ms "
+        f"max={max(latencies):.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=5000)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--profile", choices=sorted(PROFILES), action="append",
+                        help="Profile to run (repeatable, default: all)")
+    args = parser.parse_args()
+
+    for name in args.profile or ["legacy", "default"]:
+        run_profile(name, PROFILES[name], args.members, args.writes)
+
+
+if __name__ == "__main__":
+    main()
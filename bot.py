@@ -1,12 +1,29 @@
+import time
+BOOT = time.perf_counter()  # Startup timing starts before the heavy imports
+
 import discord
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
 import os
 import asyncio
+import logging
+import signal
 from discord import Embed, Color
-from db.dbcalls import DiscordBotCrud
+from db.service import DatabaseService
+from db.database import parse_pragmas
+from db.activitybuffer import ActivityBuffer
+from db.joinqueue import JoinQueue
+from utils.names import NameCache
+from utils.perf import Perf
+from utils.watchdog import LoopWatchdog
+from utils.logs import parse_settings, setup_logging
+from utils.startup import StartupTimer, discover_extensions
+from utils.shards import ShardStats, parse_shard_ids
 from datetime import datetime
 
+startup = StartupTimer(BOOT)
+startup.phase("imports")
+
 # Intents
 intents = discord.Intents.default()
 intents.guilds = True
@@ -15,11 +32,7 @@ intents.voice_states = True
 intents.message_content = True
 intents.members = True
 
-# Bot setup
-bot = commands.Bot(command_prefix="+", intents=intents)
-db_crud = DiscordBotCrud()
 # Load environment variables
-
 load_dotenv()
 TOKEN = os.getenv('TOKEN')
 CONSOLE = int(os.getenv('CONSOLE'))
@@ -27,13 +40,80 @@ if TOKEN is None:
     print("ERROR: Bot token not found. Check your .env file.")
     exit(1)
 
+# Sharding is off by default. SHARD_COUNT ("auto" or a number) runs an AutoShardedBot;
+# SHARD_IDS limits this process to some of the shards (launcher.py sets both per shard group).
+SHARD_COUNT = os.getenv('SHARD_COUNT', '')
+SHARD_IDS = parse_shard_ids(os.getenv('SHARD_IDS', ''))
+if SHARD_IDS and SHARD_COUNT in ('', 'auto'):
+    print("ERROR: SHARD_IDS needs SHARD_COUNT set to the total number of shards.")
+    exit(1)
+
+# Bot setup
+if SHARD_COUNT:
+    bot = commands.AutoShardedBot(command_prefix="+", intents=intents, shard_ids=SHARD_IDS,
+                                  shard_count=None if SHARD_COUNT == 'auto' else int(SHARD_COUNT))
+else:
+    bot = commands.Bot(command_prefix="+", intents=intents)
+bot.shard_stats = ShardStats()
+
+# Logs go through a queue to a background thread that writes JSON lines to a
+# rotating file, so handlers never wait on disk or the console.
+# LOG_LEVELS sets per-module levels, e.g. "db.dbcalls=WARNING;cogs.voiceChat=DEBUG".
+# LOG_SAMPLE keeps a fraction of a busy module's DEBUG/INFO records, e.g. "cogs.voiceChat=0.1".
+LOG_FILE = os.getenv('LOG_FILE', 'logs/eli_bot.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = parse_settings(os.getenv('LOG_LEVELS', ''))
+LOG_SAMPLE = parse_settings(os.getenv('LOG_SAMPLE', ''))
+logger = logging.getLogger("bot")
+
+# Latency of commands, database calls and Discord requests, shown by +perf
+bot.perf = Perf()
+
+# Logs a stack whenever synchronous code holds the event loop longer than this; +lag summarizes them
+LOOP_LAG_THRESHOLD_MS = float(os.getenv('LOOP_LAG_THRESHOLD_MS', 250))
+bot.watchdog = LoopWatchdog(LOOP_LAG_THRESHOLD_MS / 1000)
+
+# One database service for the whole process; cogs use it through bot.db.
+# SQLITE_PRAGMAS overrides the default profile, e.g. "synchronous=FULL;mmap_size=0".
+# DB_WRITER (host:port of a db.writer process) shares one database between shard-group processes.
+bot.db = DatabaseService(pragmas=parse_pragmas(os.getenv('SQLITE_PRAGMAS', '')), perf=bot.perf,
+                         writer=os.getenv('DB_WRITER'))
+WAL_CHECKPOINT_MINUTES = float(os.getenv('WAL_CHECKPOINT_MINUTES', 10))
+
+# Message counts are buffered and written in batches. The flush interval is the
+# most activity that can be lost if the bot is killed without a clean shutdown.
+ACTIVITY_FLUSH_SECONDS = float(os.getenv('ACTIVITY_FLUSH_SECONDS', 5))
+ACTIVITY_FLUSH_EVENTS = int(os.getenv('ACTIVITY_FLUSH_EVENTS', 500))
+activity_buffer = ActivityBuffer(bot.db, ACTIVITY_FLUSH_SECONDS, ACTIVITY_FLUSH_EVENTS)
+
+# New members are written in batches, so a raid doesn't cost a transaction per join
+JOIN_FLUSH_SECONDS = float(os.getenv('JOIN_FLUSH_SECONDS', 2))
+join_queue = JoinQueue(bot.db, JOIN_FLUSH_SECONDS)
+
+# Exposed for the metrics cog's buffer depth gauges
+bot.activity_buffer = activity_buffer
+bot.join_queue = join_queue
+
+# Member names for leaderboards, shared by every cog
+bot.names = NameCache(bot)
+
+# Extensions are found once. Rarely used ones are loaded on their first command
+# (keyed by command name) instead of at startup; the rest load concurrently.
+EXTENSIONS = discover_extensions(os.path.join(os.path.dirname(os.path.abspath(__file__)), "cogs"), "cogs")
+LAZY_EXTENSIONS = {"info": "cogs.helpmenu", "report": "cogs.reporting"}
+pending_lazy = set(LAZY_EXTENSIONS.values()) & set(EXTENSIONS)
+lazy_lock = asyncio.Lock()
+
 # Events
 @bot.event
 async def on_ready():
-    print(f"Logged in as {bot.user} (ID: {bot.user.id})")
-    print(f"Connected to {len(bot.guilds)} guild(s).")
-    print("Bot is ready!")
-    print(db_crud.get_user_activity(1201187317860290662))
+    if startup.phases[-1][0] != "gateway ready":
+        startup.phase("gateway ready")
+        logger.info(startup.report())
+    logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    logger.info(f"Connected to {len(bot.guilds)} guild(s).")
+    logger.info("Bot is ready!")
+    await sync_members()
 
     
     console_msg = bot.get_channel(CONSOLE)
@@ -50,13 +130,25 @@ async def on_ready():
 
     
 
+async def sync_members():
+    """Add members who joined while the bot was offline and mark those who left."""
+    start = time.perf_counter()
+    members = {member.id: member.name for guild in bot.guilds for member in guild.members if not member.bot}
+    # Without a complete member list, absent members may just not be cached yet.
+    # A shard group only sees some guilds, so it can't tell who left either.
+    complete = all(guild.chunked for guild in bot.guilds) and SHARD_IDS is None
+    added, departed = await bot.db.sync_members(members.items(), mark_departed=complete)
+    logger.info(f"Member sync: {len(members)} in guilds, {added} added, {departed} marked as left "
+          f"in {time.perf_counter() - start:.2f}s")
+
 @bot.event
 async def on_member_join(member):
     """Handle when a member joins the server."""
-    # Add member to the database
+    # Queue the member for the next batched write
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    db_crud.add_member(member.id)
-    print(f"Member added to database: {member.name} (ID: {member.id})")
+    if join_queue.add(member.id, member.name):
+        await join_queue.flush()
+    logger.info(f"Member queued for database: {member.name} (ID: {member.id})", extra={"member_id": member.id})
 
     # Send message to console channel
     console_channel = bot.get_channel(CONSOLE)
@@ -72,10 +164,11 @@ async def on_member_join(member):
 @bot.event
 async def on_member_remove(member):
     """Handle when a member leaves the server."""
-    # Remove member from the database
+    # Mark the member as left; their data is kept in case they come back
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    db_crud.remove_member(member.id)
-    print(f"Member removed from database: {member.name} (ID: {member.id})")
+    join_queue.discard(member.id)  # In case they leave before their join was written
+    await bot.db.mark_members_left([member.id])
+    logger.info(f"Member marked as left: {member.name} (ID: {member.id})", extra={"member_id": member.id})
 
     # Send message to console channel
     console_channel = bot.get_channel(CONSOLE)
@@ -88,6 +181,18 @@ async def on_member_remove(member):
         embed.set_footer(text=f"Left at {current_time}")
         await console_channel.send(embed=embed)
 
+@bot.event
+async def on_shard_connect(shard_id):
+    bot.shard_stats.count(shard_id, "connects")
+
+@bot.event
+async def on_shard_disconnect(shard_id):
+    bot.shard_stats.count(shard_id, "disconnects")
+
+@bot.event
+async def on_shard_resumed(shard_id):
+    bot.shard_stats.count(shard_id, "resumes")
+
 @bot.event
 async def on_message(message):
     if message.author.bot:
@@ -95,31 +200,119 @@ async def on_message(message):
 
     # Get the MemberId from the message author
     member_id = message.author.id
+    if message.guild:
+        bot.shard_stats.count(message.guild.shard_id, "messages")
+
+    # Count the message in memory; flush early if the buffer is full
+    if activity_buffer.record_message(member_id):
+        await activity_buffer.flush()
 
-    # Call the function to update the message count
-    db_crud.increment_messages_sent(member_id)
+    # Load a deferred cog before its first command is dispatched
+    if pending_lazy and message.content.startswith(bot.command_prefix):
+        words = message.content[len(bot.command_prefix):].split(None, 1)
+        extension = LAZY_EXTENSIONS.get(words[0]) if words else None
+        if extension in pending_lazy:
+            await load_lazy(extension)
 
     # Process commands or other bot-related logic
     await bot.process_commands(message)
 
 user_voice_times = {}
 
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.perf_start = time.perf_counter()
+    bot.watchdog.enter(ctx.command.qualified_name)
+
+@bot.after_invoke
+async def record_command_time(ctx):
+    # Runs after failed commands too
+    bot.watchdog.leave()
+    elapsed = (time.perf_counter() - ctx.perf_start) * 1000
+    bot.perf.record("command", ctx.command.qualified_name, elapsed, failed=ctx.command_failed)
+
+@tasks.loop(seconds=ACTIVITY_FLUSH_SECONDS)
+async def flush_activity():
+    """Write buffered message counts to the database."""
+    await activity_buffer.flush()
+
+@tasks.loop(seconds=JOIN_FLUSH_SECONDS)
+async def flush_joins():
+    """Write queued member joins to the database."""
+    await join_queue.flush()
+
+@tasks.loop(minutes=WAL_CHECKPOINT_MINUTES)
+async def checkpoint_wal():
+    """Keep the write-ahead log from growing between sqlite's automatic checkpoints."""
+    await bot.db.checkpoint()
+
+@tasks.loop(hours=1)
+async def rollup_activity():
+    """Fold old hourly activity buckets into daily ones so the table stays small."""
+    await bot.db.rollup_activity()
+
 
 # Load cogs
+async def load_extension(extension):
+    """Load one extension. Returns its load time in ms, or None if it failed."""
+    start = time.perf_counter()
+    try:
+        await bot.load_extension(extension)
+    except Exception as e:
+        logger.error(f"Failed to load cog {extension}: {e}")
+        return None
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"Loaded cog: {extension} in {elapsed:.1f}ms")
+    return elapsed
+
+async def load_lazy(extension):
+    async with lazy_lock:
+        if extension in pending_lazy:
+            pending_lazy.discard(extension)
+            await load_extension(extension)
+
 async def Load():
-    for filename in os.listdir("./cogs"):
-        if filename.endswith(".py"):
-            try:
-                await bot.load_extension(f"cogs.{filename[:-3]}")
-                print(f"Loaded cog: {filename}")
-            except Exception as e:
-                print(f"Failed to load cog {filename}: {e}")
+    """Load every extension that isn't deferred, concurrently. Returns {extension: ms}."""
+    eager = [extension for extension in EXTENSIONS if extension not in pending_lazy]
+    timings = await asyncio.gather(*(load_extension(extension) for extension in eager))
+    return dict(zip(eager, timings))
 
 # Main function
 async def main():
+    log_listener = setup_logging(LOG_FILE, LOG_LEVEL, LOG_LEVELS, LOG_SAMPLE)
     async with bot:
-        await Load()
-        await bot.start(TOKEN)
+        bot.perf.instrument_http(bot.http)
+        bot.watchdog.start()
+        startup.phase("setup")
+        await bot.db.start()
+        startup.phase("db init")
+        timings = await Load()
+        loaded = {extension: ms for extension, ms in timings.items() if ms is not None}
+        slowest = max(loaded, key=loaded.get, default=None)
+        startup.phase("cog setup", f"{len(loaded)}/{len(timings)} cogs, {len(pending_lazy)} deferred"
+                      + (f", slowest {slowest} {loaded[slowest]:.0f}ms" if slowest else ""))
+        flush_activity.start()
+        flush_joins.start()
+        checkpoint_wal.start()
+        rollup_activity.start()
+        try:
+            # Shut down cleanly when stopped (docker stop, launcher.py), so buffers are flushed
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(bot.close()))
+        except NotImplementedError:
+            pass  # Not available on Windows
+        try:
+            await bot.start(TOKEN)
+        finally:
+            # Don't lose buffered activity on shutdown
+            flush_activity.cancel()
+            flush_joins.cancel()
+            checkpoint_wal.cancel()
+            rollup_activity.cancel()
+            bot.watchdog.stop()
+            await activity_buffer.flush()
+            await join_queue.flush()
+            await bot.db.close()
+            log_listener.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
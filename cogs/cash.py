@@ -1,14 +1,12 @@
 import discord
 from discord.ext import commands
-from db.dbcalls import DiscordBotCrud
 import datetime
 import logging
 
-db_crud = DiscordBotCrud()
-
 class Cash(commands.Cog):
     def __init__(self, bot):
-        self.bot = bot  # Update with your actual database file path
+        self.bot = bot
+        self.db = bot.db  # Shared database service
         self.logger = logging.getLogger(__name__)
 
     @commands.command(name='addCash')
@@ -35,8 +33,8 @@ class Cash(commands.Cog):
             await ctx.send("Invalid amount. Please provide a valid integer.")
             return
 
-        print(f"Adding {cash_int} Cash to Member ID: {member.id}")
-        db_crud.add_cash(member.id, cash_int)
+        self.logger.info(f"Adding {cash_int} Cash to Member ID: {member.id}")
+        await self.db.add_cash(member.id, cash_int, reason=f"admin add by {ctx.author.id}")
         logging.info(f"Added {cash_int} Cash to Member ID: {member.id}")
         await ctx.send(f"Added {cash_int} Cash to {member.mention}.")
 
@@ -70,8 +68,8 @@ class Cash(commands.Cog):
             await ctx.send("Invalid amount. Please provide a valid integer.")
             return
 
-        print(f"Removing {cash_int} Cash to Member ID: {member.id}")
-        db_crud.remove_cash(member.id, cash_int)
+        self.logger.info(f"Removing {cash_int} Cash to Member ID: {member.id}")
+        await self.db.remove_cash(member.id, cash_int, reason=f"admin remove by {ctx.author.id}")
         logging.info(f"Removed {cash_int} Cash to Member ID: {member.id}")
         await ctx.send(f"Removed {cash_int} Cash to {member.display_name}.")
 
@@ -82,7 +80,7 @@ class Cash(commands.Cog):
 
         # Get the top users based on XP from the database
         try:
-            top_users_xp = db_crud.get_top_cash()  # Ensure db_crud.get_top_xp() is defined properly
+            top_users_xp = await self.db.get_top_cash()  # Ensure self.db.get_top_cash() is defined properly
             self.logger.debug(f"Fetched top users: {top_users_xp}")
         except Exception as e:
             self.logger.error(f"Error fetching top users: {e}")
@@ -108,19 +106,13 @@ class Cash(commands.Cog):
             9: "<a:4029number9:1320173932325896273>",
         }
 
+        # Resolve every name at once from the cache (REST only for unknown members)
+        names = await ctx.bot.names.resolve_many([member_id for member_id, _ in top_users_xp], ctx.guild)
+
         # Prepare the leaderboard message
         description = ""
         for rank, (member_id, xp) in enumerate(top_users_xp, start=1):
-            try:
-                # Fetch member using the MemberId
-                member = await ctx.bot.fetch_user(member_id)  # Correct way to fetch a user
-                member_name = member.name if member else f"User Left ({member_id})"
-            except discord.NotFound:
-                self.logger.warning(f"Member {member_id} not found. Assuming user left.")
-                member_name = f"User Left ({member_id})"
-            except Exception as e:
-                self.logger.error(f"Error fetching member {member_id}: {e}")
-                member_name = f"Unknown User ({member_id})"
+            member_name = names[member_id]
 
             # Get the appropriate emote for the rank
             emote = rank_emotes.get(rank, f"Rank {rank}")  # Default to just the rank number if not in emotes
@@ -1,18 +1,25 @@
 import discord
 import random
 import asyncio
-from discord.ext import commands
-from db.dbcalls import DiscordBotCrud
+import heapq
+import time
+from discord.ext import commands, tasks
 import logging
 import traceback
+from games.blackjack import BlackjackGame, Shoe, FINISHED
 
-db_crud = DiscordBotCrud()
+BLACKJACK_TIMEOUT = 30.0  # Seconds a table waits for a button before standing
+
+SLOTS_WIN_CHANCE = 0.35  # Chance a spin is forced to three of a kind
+MAX_SPINS = 20            # Most slots spins in one command (keeps the summary embed readable)
+MAX_ROULETTE_BETS = 10    # Most spaces on one roulette slip
 
 class SlotsGame:
-    def __init__(self):
+    def __init__(self, db):
+        self.db = db
         self.symbols = ['🍒', '🍋', '🔔', '🍉', '⭐', '7️⃣']
 
-    def spin(self, win_chance=0.35):
+    def spin(self, win_chance=SLOTS_WIN_CHANCE):
         if random.random() < win_chance:
             # Create a winning combination
             symbol = random.choice(self.symbols)
@@ -27,25 +34,29 @@ class SlotsGame:
         else:
             return 0  # No win
 
-    async def play_slots(self, ctx, bet_amount: int):
+    async def play_slots(self, ctx, bet_amount: int, spins: int = 1):
         member_id = ctx.author.id
-        current_cash = db_crud.get_cash(member_id)  # Replace with your method to retrieve user's cash
-
-        if bet_amount <= 0 or bet_amount > current_cash:
+        results = [self.spin() for _ in range(spins)]
+        payouts = [self.calculate_winnings(bet_amount, result) for result in results]
+        winnings = sum(payouts)
+        staked = bet_amount * spins
+
+        # Take every bet and pay out in one transaction; None means the bets weren't covered
+        if bet_amount <= 0 or await self.db.settle_bet(member_id, staked, winnings, "slots") is None:
+            ctx.command.reset_cooldown(ctx)  # Nothing was bet
             embed = discord.Embed(title="Error!", description='Invalid bet amount.', color=discord.Color.from_rgb(249,177,181))
             embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url)
             await ctx.send(embed=embed)
             return
 
-        db_crud.remove_cash(member_id, bet_amount)
-
-        result = self.spin()
-        winnings = self.calculate_winnings(bet_amount, result)
-
-        result_prompt = f"**Result:** {' '.join(result)}\n\n"
+        if spins == 1:
+            result_prompt = f"**Result:** {' '.join(results[0])}\n\n"
+        else:
+            result_prompt = "\n".join(f"{' '.join(result)}  {'+' + str(payout) if payout else ''}"
+                                      for result, payout in zip(results, payouts))
+            result_prompt += f"\n\n**{spins} spins** for {staked}, net {winnings - staked:+}\n\n"
 
         if winnings > 0:
-            self.add_cash(member_id, winnings)
             result_prompt += f"🎉  **Winner:**  🎉\n{ctx.author.mention} won {str(winnings)}!"
             color = discord.Color.green()
         else:
@@ -64,18 +75,19 @@ class SlotsGame:
                 color=color
             )
             log_embed.add_field(name="User", value=ctx.author.display_name, inline=False)
-            log_embed.add_field(name="Bet Amount", value=f"{bet_amount}", inline=False)
-            log_embed.add_field(name="Result", value=f"{' '.join(result)}", inline=False)
+            log_embed.add_field(name="Bet Amount", value=f"{bet_amount}" if spins == 1 else f"{bet_amount} x{spins}", inline=False)
+            log_embed.add_field(name="Result", value="\n".join(' '.join(result) for result in results), inline=False)
             if winnings > 0:
                 log_embed.add_field(name="**Win**", value=f"{winnings}", inline=False)
             else:
-                log_embed.add_field(name="**Loss**", value=f"-{bet_amount}", inline=False)
+                log_embed.add_field(name="**Loss**", value=f"-{staked}", inline=False)
 
             await log_channel.send(embed=log_embed)
 
 
 class RouletteGame:
-    def __init__(self):
+    def __init__(self, db):
+        self.db = db
         self.slots = {
             '0': 'green', '00': 'green', '1': 'red', '2': 'black', '3': 'red', '4': 'black', '5': 'red',
             '6': 'black', '7': 'red', '8': 'black', '9': 'red', '10': 'black', '11': 'black', '12': 'red', 
@@ -85,51 +97,59 @@ class RouletteGame:
             '34': 'red', '35': 'black', '36': 'red'
         }
 
-    async def play_roulette(self, ctx, bet_amount: int, space: str):
-        member_id = ctx.author.id
-        current_cash = db_crud.get_cash(member_id)  # Replace with your method to retrieve user's cash
-
-        if bet_amount < 100 or bet_amount > current_cash or bet_amount > 1000:
-            embed = discord.Embed(title="Error!", description='Invalid bet amount. Bet must be between 100 and 1000 and within your current cash.', color=discord.Color.from_rgb(249,177,181))
-            embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url)
-            await ctx.send(embed=embed)
-            return
-
-        db_crud.remove_cash(member_id, bet_amount)
-
-        # Determine the multiplier based on the space bet on
+    def multiplier(self, space):
+        """What a winning bet on this space pays, as a multiple of the bet."""
         if space in ["odd", "even", "black", "red"]:
-            multiplier = 2
-        else:
-            multiplier = 35
-
-        result = random.choice(list(self.slots.keys()))
-        result_prompt = f"The ball landed on: **{self.slots[result]} {result}**!\n\n"
+            return 2
+        return 35
 
+    def is_win(self, space, result):
+        """Whether a bet on space wins when the ball lands on result."""
         if space == "black":
-            win = 1 if self.slots[result] == "black" else 0
+            return 1 if self.slots[result] == "black" else 0
 
         elif space == "red":
-            win = 1 if self.slots[result] == "red" else 0
+            return 1 if self.slots[result] == "red" else 0
 
         elif space == "even":
             result_num = int(result)
-            win = 1 if (result_num % 2) == 0 else 0
+            return 1 if (result_num % 2) == 0 else 0
 
         elif space == "odd":
             result_num = int(result)
-            win = 1 if (result_num % 2) != 0 else 0
+            return 1 if (result_num % 2) != 0 else 0
 
         elif space.isdigit():  # Check if the space is a specific number
-            win = 1 if space == result else 0
+            return 1 if space == result else 0
 
-        else:
-            # This should not happen under normal circumstances
-            print("Unexpected condition.")
+        # This should not happen under normal circumstances
+        logging.getLogger(__name__).warning(f"Unexpected roulette space {space!r}.")
+        return 0
+
+    async def play_roulette(self, ctx, bet_amount: int, spaces):
+        """Spin once for a slip of bets, bet_amount on each space, and settle them together."""
+        member_id = ctx.author.id
+
+        result = random.choice(list(self.slots.keys()))
+        result_prompt = f"The ball landed on: **{self.slots[result]} {result}**!\n\n"
+        payouts = [bet_amount * self.multiplier(space) if self.is_win(space, result) else 0 for space in spaces]
+        winnings = sum(payouts)
+        staked = bet_amount * len(spaces)
 
-        if win:
-            winnings = bet_amount * multiplier
-            db_crud.add_cash(member_id, winnings)
+        # Take the slip and pay out in one transaction; None means the bets weren't covered
+        if bet_amount < 100 or bet_amount > 1000 or await self.db.settle_bet(member_id, staked, winnings, "roulette") is None:
+            ctx.command.reset_cooldown(ctx)  # Nothing was bet
+            embed = discord.Embed(title="Error!", description='Invalid bet amount. Bet must be between 100 and 1000 and within your current cash.', color=discord.Color.from_rgb(249,177,181))
+            embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url)
+            await ctx.send(embed=embed)
+            return
+
+        if len(spaces) > 1:
+            result_prompt += "\n".join(f"**{space}**: {'won ' + str(payout) if payout else 'lost'}"
+                                       for space, payout in zip(spaces, payouts))
+            result_prompt += f"\n\n{len(spaces)} bets for {staked}, net {winnings - staked:+}\n\n"
+
+        if winnings:
             result_prompt += f"🎉  **Winner:**  🎉\n{ctx.author.mention} won {str(winnings)}!"
             color = discord.Color.green()
         else:
@@ -143,47 +163,147 @@ class RouletteGame:
         log_channel = ctx.guild.get_channel(1310756010662822009)
         if log_channel:
             log_message = f"Roulette Result:\nUser: {ctx.author.display_name} ({ctx.author.id})\n"
-            log_message += f"Bet Amount: {bet_amount}\nBet Space: {space}\n"
+            log_message += f"Bet Amount: {bet_amount}\nBet Space: {', '.join(spaces)}\n"
             log_message += f"Result: {self.slots[result]} {result}\n"
-            if win:
+            if winnings:
                 log_message += f"**Win:** {winnings}\n"
             else:
-                log_message += f"**Loss:** -{bet_amount}\n"
+                log_message += f"**Loss:** -{staked}\n"
 
             await log_channel.send(log_message)
 
+class BlackjackTable:
+    """An open blackjack game and the message showing it."""
+
+    def __init__(self, game, message, member, expires_at):
+        self.game = game
+        self.message = message
+        self.member = member
+        self.expires_at = expires_at
+
+
+class BlackjackView(discord.ui.View):
+    """Hit and Stand buttons shared by every blackjack table.
+
+    One persistent view serves every table; the cog finds the game from the
+    user who clicked and the message they clicked on.
+    """
+
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    @discord.ui.button(label="Hit", style=discord.ButtonStyle.primary, custom_id="blackjack:hit")
+    async def hit(self, interaction, button):
+        await self.cog.blackjack_action(interaction, "hit")
+
+    @discord.ui.button(label="Stand", style=discord.ButtonStyle.secondary, custom_id="blackjack:stand")
+    async def stand(self, interaction, button):
+        await self.cog.blackjack_action(interaction, "stand")
+
+
 class Gambling(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.db = bot.db  # Shared database service
         self.logger = logging.getLogger(__name__)
-        self.roulette_game = RouletteGame()
-        self.slots_game = SlotsGame()
-
-        # Define the suits and values
-        self.suits = ['♢', '♧', '♡', '♤']
-        self.values = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-
-        # Create a full deck of cards (note the use of self to refer to values)
-        self.deck = [f'{value}{suit}' for suit in self.suits for value in self.values]
-
-    # Other methods and functions will go here...
-    # Card values for blackjack
-    card_values = {
-        '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10,
-        'J': 10, 'Q': 10, 'K': 10, 'A': 11
-    }
-
-    def deal_card(self):
-        return random.choice(self.deck)
-
-    # Calculate hand value
-    def calculate_hand_value(self, hand):
-        value = sum(self.card_values[card[:-1]] for card in hand)
-        aces = sum(1 for card in hand if card[:-1] == 'A')
-        while value > 21 and aces:
-            value -= 10
-            aces -= 1
-        return value
+        self.roulette_game = RouletteGame(self.db)
+        self.slots_game = SlotsGame(self.db)
+
+        # Blackjack tables, keyed by (MemberId, MessageId) so a button click is one lookup
+        self.shoe = Shoe()
+        self.tables = {}
+        self.table_expiry = []  # Heap of (expires_at, key); stale entries are skipped
+        self.blackjack_view = BlackjackView(self)
+        bot.add_view(self.blackjack_view)
+        self.sweep_tables.start()
+
+    async def cog_unload(self):
+        # Finish open tables so nobody loses a bet to a restart
+        self.sweep_tables.cancel()
+        for key in list(self.tables):
+            await self.close_table(key, timed_out=True)
+        self.blackjack_view.stop()
+
+    def blackjack_embed(self, table, timed_out=False):
+        game = table.game
+        embed = discord.Embed(title="Blackjack", description=f"Bet: {game.bet}", color=discord.Color.from_rgb(249,177,181))
+        embed.set_author(name=table.member.display_name, icon_url=table.member.display_avatar.url)
+        embed.add_field(name="Your Hand", value=f'{" ".join(game.player)} (value: {game.player_value})', inline=False)
+        if game.state != FINISHED:
+            embed.add_field(name="Dealer's Hand", value=f'{game.dealer[0]} ?', inline=False)
+            return embed
+
+        embed.add_field(name="Dealer's Hand", value=f'{" ".join(game.dealer)} (value: {game.dealer_value})', inline=False)
+        bet, player, dealer = game.bet, game.player_value, game.dealer_value
+        result = {
+            "bust": f'You busted with a hand value of {player}. You lose your bet of {bet}.',
+            "dealer_bust": f'Dealer busts with a hand value of {dealer}. You win {bet * 2}!',
+            "lose": f'Dealer wins with {dealer} against your {player}. You lose your bet of {bet}.',
+            "win": f'You win with {player} against dealer\'s {dealer}. You win {bet * 2}!',
+            "push": f'It\'s a tie with both having {player}. Your bet of {bet} is returned.',
+        }[game.outcome]
+        if timed_out:
+            result = f'You took too long to respond. Standing by default.\n{result}'
+        embed.add_field(name="Result", value=result, inline=False)
+        return embed
+
+    async def settle_blackjack(self, game):
+        if game.payout:
+            reason = "blackjack push" if game.outcome == "push" else "blackjack payout"
+            await self.db.add_cash(game.player_id, game.payout, reason=reason)
+
+    def touch_table(self, key, table):
+        table.expires_at = time.monotonic() + BLACKJACK_TIMEOUT
+        heapq.heappush(self.table_expiry, (table.expires_at, key))
+
+    async def close_table(self, key, timed_out=False):
+        """Stand a table that ran out of time, pay it out and take its buttons away."""
+        table = self.tables.pop(key, None)
+        if table is None:
+            return
+        table.game.stand()
+        await self.settle_blackjack(table.game)
+        try:
+            await table.message.edit(embed=self.blackjack_embed(table, timed_out), view=None)
+        except discord.HTTPException as e:
+            self.logger.warning(f"Could not update blackjack table {key}: {e}")
+
+    async def blackjack_action(self, interaction, action):
+        key = (interaction.user.id, interaction.message.id)
+        table = self.tables.get(key)
+        if table is None:
+            await interaction.response.send_message("This isn't your table, or the game has already ended.", ephemeral=True)
+            return
+
+        game = table.game
+        if action == "hit":
+            game.hit()
+        else:
+            game.stand()
+
+        if game.state == FINISHED:
+            # Pay out before responding, so an expired interaction can't cost the player their winnings
+            del self.tables[key]
+            await self.settle_blackjack(game)
+            try:
+                await interaction.response.edit_message(embed=self.blackjack_embed(table), view=None)
+            except discord.HTTPException as e:
+                self.logger.warning(f"Could not update blackjack table {key}: {e}")
+        else:
+            self.touch_table(key, table)
+            await interaction.response.edit_message(embed=self.blackjack_embed(table))
+
+    @tasks.loop(seconds=5)
+    async def sweep_tables(self):
+        """Stand every table whose player stopped responding."""
+        now = time.monotonic()
+        while self.table_expiry and self.table_expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self.table_expiry)
+            table = self.tables.get(key)
+            # Tables that finished or were touched since this entry was pushed are skipped
+            if table is not None and table.expires_at == expires_at:
+                await self.close_table(key, timed_out=True)
 
     error_color = discord.Color.from_rgb(204, 0, 0)
 
@@ -191,7 +311,6 @@ class Gambling(commands.Cog):
     @commands.cooldown(1, 86400, commands.BucketType.user)
     async def blackjack(self, ctx, bet: int):
         member_id = ctx.author.id
-        current_cash = db_crud.get_cash(member_id)
 
         if bet < 100 or bet > 1000:
             embed = discord.Embed(title="<:pinkexclamationmark:1326270444679991296> Error!", description='Bet must be between 100 and 1000.', color=discord.Color.from_rgb(249,177,181))
@@ -199,69 +318,27 @@ class Gambling(commands.Cog):
             self.blackjack.reset_cooldown(ctx)
             return
 
-        if current_cash < bet:
+        # Deduct the bet from the player's cash, only if it covers the bet
+        if await self.db.debit_cash(member_id, bet, "blackjack bet") is None:
+            current_cash = await self.db.get_cash(member_id)
             embed = discord.Embed(title="<:pinkexclamationmark:1326270444679991296> Error!", description=f'You do not have enough cash to place this bet. Your current cash is {current_cash}.', color=discord.Color.from_rgb(249,177,181))
             await ctx.send(embed=embed)
             self.blackjack.reset_cooldown(ctx)
             return
 
-        # Deduct the bet from the player's cash
-        db_crud.remove_cash(member_id, bet)
+        game = BlackjackGame(member_id, bet, self.shoe)
+        table = BlackjackTable(game, None, ctx.author, 0)
 
-        player_hand = [self.deal_card(), self.deal_card()]
-        dealer_hand = [self.deal_card(), self.deal_card()]
-
-        embed = discord.Embed(title="Blackjack", description=f"Bet: {bet}", color=discord.Color.from_rgb(249,177,181))
-        embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url)
-        embed.add_field(name="Your Hand", value=f'{" ".join(player_hand)} (value: {self.calculate_hand_value(player_hand)})', inline=False)
-        embed.add_field(name="Dealer's Hand", value=f'{dealer_hand[0]} ?', inline=False)
-
-        message = await ctx.send(embed=embed)
-
-        while self.calculate_hand_value(player_hand) < 21:
-            await ctx.send('Do you want to hit or stand? (respond with `hit` or `stand`)')
-
-            def check(m):
-                return m.author == ctx.author and m.channel == ctx.channel and m.content.lower() in ['hit', 'stand']
-
-            try:
-                msg = await self.bot.wait_for('message', check=check, timeout=30.0)
-            except asyncio.TimeoutError:
-                await ctx.send('You took too long to respond. Standing by default.')
-                break
-
-            if msg.content.lower() == 'hit':
-                player_hand.append(self.deal_card())
-                embed.set_field_at(0, name="Your Hand", value=f'{" ".join(player_hand)} (value: {self.calculate_hand_value(player_hand)})', inline=False)
-                await message.edit(embed=embed)
-            else:
-                break
-
-        player_value = self.calculate_hand_value(player_hand)
-        if player_value > 21:
-            await ctx.send(f'You busted with a hand value of {player_value}. You lose your bet of {bet}.')
+        # A natural 21 is settled on the deal
+        if game.state == FINISHED:
+            await self.settle_blackjack(game)
+            await ctx.send(embed=self.blackjack_embed(table))
             return
 
-        embed.set_field_at(1, name="Dealer's Hand", value=f'{" ".join(dealer_hand)} (value: {self.calculate_hand_value(dealer_hand)})', inline=False)
-        await message.edit(embed=embed)
-
-        while self.calculate_hand_value(dealer_hand) < 17:
-            dealer_hand.append(self.deal_card())
-            embed.set_field_at(1, name="Dealer's Hand", value=f'{" ".join(dealer_hand)} (value: {self.calculate_hand_value(dealer_hand)})', inline=False)
-            await message.edit(embed=embed)
-
-        dealer_value = self.calculate_hand_value(dealer_hand)
-        if dealer_value > 21:
-            await ctx.send(f'Dealer busts with a hand value of {dealer_value}. You win {bet * 2}!')
-            db_crud.add_cash(member_id, bet * 2)
-        elif dealer_value > player_value:
-            await ctx.send(f'Dealer wins with {dealer_value} against your {player_value}. You lose your bet of {bet}.')
-        elif dealer_value < player_value:
-            await ctx.send(f'You win with {player_value} against dealer\'s {dealer_value}. You win {bet * 2}!')
-            db_crud.add_cash(member_id, bet * 2)
-        else:
-            await ctx.send(f'It\'s a tie with both having {player_value}. Your bet of {bet} is returned.')
-            db_crud.add_cash(member_id, bet)
+        table.message = await ctx.send(embed=self.blackjack_embed(table), view=self.blackjack_view)
+        key = (member_id, table.message.id)
+        self.tables[key] = table
+        self.touch_table(key, table)
 
     @commands.Cog.listener()
     async def blackjack_error(self, ctx, error):
@@ -305,12 +382,21 @@ class Gambling(commands.Cog):
 
     @commands.command(name='roulette')
     @commands.cooldown(1, 86400, commands.BucketType.user)
-    async def roulette(self, ctx, bet_amount: int, space: str):
-        if space not in ["odd", "even", "black", "red"] and not space.isdigit():
-            embed = discord.Embed(title="Error!", description="Invalid space. Please bet on 'odd', 'even', 'black', 'red', or a specific number (0-36).", color=discord.Color.from_rgb(249,177,181))
+    async def roulette(self, ctx, bet_amount: int, space: str, *more_spaces: str):
+        """Bet on one space, or several at once (bet_amount on each): +roulette 200 red 17 odd"""
+        spaces = [space, *more_spaces]
+        # A rejected slip doesn't use up the day's spin
+        if any(s not in ["odd", "even", "black", "red"] and s not in self.roulette_game.slots for s in spaces):
+            ctx.command.reset_cooldown(ctx)
+            embed = discord.Embed(title="Error!", description="Invalid space. Please bet on 'odd', 'even', 'black', 'red', or a specific number (0, 00 or 1-36).", color=discord.Color.from_rgb(249,177,181))
             await ctx.send(embed=embed)
             return
-        await self.roulette_game.play_roulette(ctx, bet_amount, space)
+        if len(spaces) > MAX_ROULETTE_BETS:
+            ctx.command.reset_cooldown(ctx)
+            embed = discord.Embed(title="Error!", description=f"You can bet on at most {MAX_ROULETTE_BETS} spaces per spin.", color=discord.Color.from_rgb(249,177,181))
+            await ctx.send(embed=embed)
+            return
+        await self.roulette_game.play_roulette(ctx, bet_amount, spaces)
 
     @roulette.error
     async def roulette_error(self, ctx, error):
@@ -341,11 +427,18 @@ class Gambling(commands.Cog):
 
     @commands.command(name='slots')
     @commands.cooldown(1, 86400, commands.BucketType.user)
-    async def slots(ctx, bet_amount: int):
-        await SlotsGame.play_slots(ctx, bet_amount)
+    async def slots(self, ctx, bet_amount: int, spins: str = "x1"):
+        """Spin once, or several times in one go: +slots 100 x10"""
+        count = spins.lower().removeprefix("x")
+        if not count.isdigit() or not 1 <= int(count) <= MAX_SPINS:
+            ctx.command.reset_cooldown(ctx)  # A typo doesn't use up the day's spins
+            embed = discord.Embed(title="Error!", description=f"Spins must look like `x5`, between x1 and x{MAX_SPINS}.", color=discord.Color.from_rgb(249,177,181))
+            await ctx.send(embed=embed)
+            return
+        await self.slots_game.play_slots(ctx, bet_amount, int(count))
 
     @slots.error
-    async def slots_error(ctx, error):
+    async def slots_error(self, ctx, error):
         traceback.print_exc()
         if isinstance(error, commands.CommandOnCooldown):
             embed = discord.Embed(
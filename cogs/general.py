@@ -1,15 +1,13 @@
 import discord
 from discord.ext import commands
-from db.dbcalls import DiscordBotCrud
 import datetime
 import logging
 
-db_crud = DiscordBotCrud()
-
 
 class General(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.db = bot.db  # Shared database service
         self.logger = logging.getLogger(__name__)
 
     @commands.Cog.listener()
@@ -34,12 +32,14 @@ class General(commands.Cog):
 
         # Fetch the user's data from the database
         try:
-            user_activity = db_crud.get_user_activity(member.id)  # Using the member's ID
+            user_activity = await self.db.get_user_activity(member.id)  # Using the member's ID
             if user_activity:
                 messages_sent = user_activity['MessagesSent']
                 xp = user_activity['XP']
                 minutes_in_vc = user_activity.get('MinutesInVC', 0)  # Default to 0 if no VC time is recorded
                 cash = user_activity.get('Cash', 0)  # Default to 0 if no Cash is recorded
+                xp_rank, _ = await self.db.get_rank(member.id, "XP")
+                xp_rank_text = f" (#{xp_rank})" if xp_rank else ""
 
                 # Create the embed for displaying the stats
                 embed = discord.Embed(
@@ -47,7 +47,7 @@ class General(commands.Cog):
                     color=discord.Color.from_rgb(249,177,181),
                     description=(
                         f"<:BabyPinkArrowRight:1326221748676591717>**Messages Sent:** {messages_sent} messages\n"
-                        f"<:BabyPinkArrowRight:1326221748676591717>**XP:** {xp} XP\n"
+                        f"<:BabyPinkArrowRight:1326221748676591717>**XP:** {xp} XP{xp_rank_text}\n"
                         f"<:BabyPinkArrowRight:1326221748676591717>**Minutes in VC:** {minutes_in_vc:.2f} minutes\n"
                         f"<:BabyPinkArrowRight:1326221748676591717>**Cash:** <:pinkclover:1326218907341688915>{cash}"
                     )
@@ -58,7 +58,7 @@ class General(commands.Cog):
             else:
                 await ctx.send(f"Could not find stats for {member.name}. Please make sure they've been active.")
         except Exception as e:
-            print(f"Error fetching user stats for {member.name}: {e}")
+            self.logger.error(f"Error fetching user stats for {member.name}: {e}")
             await ctx.send("An error occurred while fetching the stats. Please try again later.")
 
 
@@ -70,7 +70,7 @@ class General(commands.Cog):
 
         # Get the top users based on XP from the database
         try:
-            top_users_xp = db_crud.get_top_xp()  # Ensure db_crud.get_top_xp() is defined properly
+            top_users_xp = await self.db.get_top_xp()  # Ensure self.db.get_top_xp() is defined properly
             self.logger.debug(f"Fetched top users: {top_users_xp}")
         except Exception as e:
             self.logger.error(f"Error fetching top users: {e}")
@@ -96,19 +96,13 @@ class General(commands.Cog):
             9: "<a:4029number9:1320173932325896273>",
         }
 
+        # Resolve every name at once from the cache (REST only for unknown members)
+        names = await ctx.bot.names.resolve_many([member_id for member_id, _ in top_users_xp], ctx.guild)
+
         # Prepare the leaderboard message
         description = ""
         for rank, (member_id, xp) in enumerate(top_users_xp, start=1):
-            try:
-                # Fetch member using the MemberId
-                member = await ctx.bot.fetch_user(member_id)  # Correct way to fetch a user
-                member_name = member.name if member else f"User Left ({member_id})"
-            except discord.NotFound:
-                self.logger.warning(f"Member {member_id} not found. Assuming user left.")
-                member_name = f"User Left ({member_id})"
-            except Exception as e:
-                self.logger.error(f"Error fetching member {member_id}: {e}")
-                member_name = f"Unknown User ({member_id})"
+            member_name = names[member_id]
 
             # Get the appropriate emote for the rank
             emote = rank_emotes.get(rank, f"Rank {rank}")  # Default to just the rank number if not in emotes
@@ -147,8 +141,8 @@ class General(commands.Cog):
             await ctx.send("Invalid amount. Please provide a valid integer.")
             return
 
-        print(f"Adding {xp_int} XP to Member ID: {member.id}")
-        db_crud.add_xp(member.id, xp_int)
+        self.logger.info(f"Adding {xp_int} XP to Member ID: {member.id}")
+        await self.db.add_xp(member.id, xp_int)
         logging.info(f"Added {xp_int} XP to Member ID: {member.id}")
         await ctx.send(f"Added {xp_int} XP to {member.display_name}.")
 
@@ -173,8 +167,8 @@ class General(commands.Cog):
             await ctx.send("Invalid amount. Please provide a valid integer.")
             return
 
-        print(f"Removed {xp_int} XP to Member ID: {member.id}")
-        db_crud.remove_xp(member.id, xp_int)
+        self.logger.info(f"Removed {xp_int} XP to Member ID: {member.id}")
+        await self.db.remove_xp(member.id, xp_int)
         logging.info(f"Removed {xp_int} XP to Member ID: {member.id}")
         await ctx.send(f"Removed {xp_int} XP to {member.display_name}.")
 
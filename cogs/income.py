@@ -1,14 +1,12 @@
 import discord
 from discord.ext import commands
-from db.dbcalls import DiscordBotCrud  # Assuming this is your database class
 from datetime import timedelta, datetime
 import logging
 
-db_crud = DiscordBotCrud()  # Initialize your database CRUD class
-
 class Income(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.db = bot.db  # Shared database service
         self.logger = logging.getLogger(__name__)
 
     @commands.Cog.listener()
@@ -37,13 +35,13 @@ class Income(commands.Cog):
 
         # Check for daily income eligibility
         if any(role.name in self.daily_role_names for role in member.roles):
-            last_daily_claim = db_crud.get_lastclaimtime(member.id, 'daily')
+            last_daily_claim = await self.db.get_lastclaimtime(member.id, 'daily')
             if last_daily_claim:
                 last_daily_claim = datetime.fromisoformat(last_daily_claim)  # Convert if it's a string
                 if (now - last_daily_claim).days >= 1:
                     # Eligible for daily income
-                    db_crud.add_cash(member.id, self.daily_income_amount)
-                    db_crud.update_lastclaimtime(member.id, 'daily', now.isoformat())
+                    await self.db.add_cash(member.id, self.daily_income_amount, reason="daily income")
+                    await self.db.update_lastclaimtime(member.id, 'daily', now.isoformat())
                     total_income += self.daily_income_amount
                     daily_message = f"<a:pinktext:1326266668321607710> **Daily Income**: <:pinkclover:1326218907341688915>  {self.daily_income_amount}."
                 else:
@@ -54,8 +52,8 @@ class Income(commands.Cog):
                     daily_message = f"<:pinkexclamationmark:1326270444679991296> **Daily income** : **{hours}hr {minutes}min**"
             else:
                 # First claim, grant daily income
-                db_crud.add_cash(member.id, self.daily_income_amount)
-                db_crud.update_lastclaimtime(member.id, 'daily', now.isoformat())
+                await self.db.add_cash(member.id, self.daily_income_amount, reason="daily income")
+                await self.db.update_lastclaimtime(member.id, 'daily', now.isoformat())
                 total_income += self.daily_income_amount
                 daily_message = f"<a:pinktext:1326266668321607710> **Daily Income**: <:pinkclover:1326218907341688915>  {self.daily_income_amount}."
 
@@ -65,14 +63,14 @@ class Income(commands.Cog):
         # Check for weekly income eligibility
         member_roles = [role.name for role in member.roles if role.name in self.weekly_role_income]
         if member_roles:
-            last_weekly_claim = db_crud.get_lastclaimtime(member.id, 'weekly')
+            last_weekly_claim = await self.db.get_lastclaimtime(member.id, 'weekly')
             if last_weekly_claim:
                 last_weekly_claim = datetime.fromisoformat(last_weekly_claim)  # Convert if it's a string
                 if (now - last_weekly_claim).days >= 7:
                     # Eligible for weekly income
                     weekly_income = sum(self.weekly_role_income[role] for role in member_roles)
-                    db_crud.add_cash(member.id, weekly_income)
-                    db_crud.update_lastclaimtime(member.id, 'weekly', now.isoformat())
+                    await self.db.add_cash(member.id, weekly_income, reason="weekly income")
+                    await self.db.update_lastclaimtime(member.id, 'weekly', now.isoformat())
                     total_income += weekly_income
                     weekly_message = f"<a:pinktext:1326266668321607710> **Weekly Income**: <:pinkclover:1326218907341688915> {weekly_income}."
                 else:
@@ -84,8 +82,8 @@ class Income(commands.Cog):
             else:
                 # First claim, grant weekly income
                 weekly_income = sum(self.weekly_role_income[role] for role in member_roles)
-                db_crud.add_cash(member.id, weekly_income)
-                db_crud.update_lastclaimtime(member.id, 'weekly', now.isoformat())
+                await self.db.add_cash(member.id, weekly_income, reason="weekly income")
+                await self.db.update_lastclaimtime(member.id, 'weekly', now.isoformat())
                 total_income += weekly_income
                 weekly_message = f"<a:pinktext:1326266668321607710> **Weekly Income**: <:pinkclover:1326218907341688915> {weekly_income}."
 
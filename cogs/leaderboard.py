@@ -1,12 +1,23 @@
 import discord
 from discord.ext import commands, tasks
-from db.dbcalls import DiscordBotCrud
 import datetime
+import hashlib
 import json
+import logging
 import os
 
 CONFIG_FILE = "config.json"
 
+# How often both boards are refreshed. Edits are skipped when nothing changed.
+LEADERBOARD_UPDATE_MINUTES = float(os.getenv("LEADERBOARD_UPDATE_MINUTES", 240))
+# When above 0, the top members are checked this often and a board is edited as
+# soon as its ranking changes (so at most one edit per board per interval).
+LEADERBOARD_LIVE_SECONDS = float(os.getenv("LEADERBOARD_LIVE_SECONDS", 0))
+
+logger = logging.getLogger(__name__)
+
+BOARDS = ("chat", "voice")
+
 # Save and load the leaderboard configuration
 def save_leaderboard_config(channel_id, chatlb_message_id, voicelb_message_id):
     try:
@@ -16,9 +27,9 @@ def save_leaderboard_config(channel_id, chatlb_message_id, voicelb_message_id):
                 "chat_message_id": chatlb_message_id,
                 "voice_message_id": voicelb_message_id
             }, f)
-            print("Leaderboard config saved successfully.")
+            logger.info("Leaderboard config saved successfully.")
     except Exception as e:
-        print(f"Error saving leaderboard config: {e}")
+        logger.error(f"Error saving leaderboard config: {e}")
 
 
 
@@ -28,18 +39,40 @@ def load_leaderboard_config():
             config = json.load(f)
         return config.get("channel_id"), config.get("chat_message_id"), config.get("voice_message_id")
     except FileNotFoundError:
-        return None, None
+        return None, None, None
+
+
+def embed_digest(embed):
+    """Hash what a leaderboard shows, ignoring the "Last updated" footer."""
+    return hashlib.sha1(f"{embed.title}\n{embed.description}".encode()).hexdigest()
 
-db_crud = DiscordBotCrud()
 
 class Leaderboard(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.db = bot.db  # Shared database service
         self.leaderboard_channel_id, self.leaderboard_message_id, self.voicelb_message_id = load_leaderboard_config()
+
+        # Per-board state, so unchanged boards cost no HTTP calls
+        self.messages = {}   # board -> discord.PartialMessage
+        self.digests = {}    # board -> digest of the content last posted
+        self.top_ids = {}    # board -> MemberIds in the order last posted
+
+        self.update_leaderboard.change_interval(minutes=LEADERBOARD_UPDATE_MINUTES)
         self.update_leaderboard.start()  # Start the task to update the leaderboard
+        if LEADERBOARD_LIVE_SECONDS > 0:
+            self.watch_leaderboard.change_interval(seconds=LEADERBOARD_LIVE_SECONDS)
+            self.watch_leaderboard.start()
 
     def cog_unload(self):
         self.update_leaderboard.cancel()  # Stop the task when the cog is unloaded
+        self.watch_leaderboard.cancel()
+
+    def forget_messages(self):
+        """Drop cached message state after the configuration changes."""
+        self.messages.clear()
+        self.digests.clear()
+        self.top_ids.clear()
 
     @commands.command(name="set_leaderboard_channel")
     @commands.has_permissions(administrator=True)
@@ -51,7 +84,7 @@ class Leaderboard(commands.Cog):
             return
         
         # Log the action to debug
-        print(f"Setting leaderboard channel to {ctx.channel.id}")
+        logger.info(f"Setting leaderboard channel to {ctx.channel.id}")
 
         # Set the current channel as the leaderboard channel
         self.leaderboard_channel_id = ctx.channel.id  
@@ -68,13 +101,16 @@ class Leaderboard(commands.Cog):
             # Save the message IDs for updates
             self.leaderboard_message_id = chat_message.id
             self.voicelb_message_id = voice_message.id
+            self.forget_messages()
+            self.messages = {"chat": chat_message, "voice": voice_message}
+            self.digests = {"chat": embed_digest(chat_embed), "voice": embed_digest(voice_embed)}
 
             # Save to the configuration file
             save_leaderboard_config(self.leaderboard_channel_id, self.leaderboard_message_id, self.voicelb_message_id)
 
             await ctx.send(f"Leaderboard channel set to {ctx.channel.mention} and messages initialized.")
         except Exception as e:
-            print(f"Error while sending leaderboard messages: {e}")
+            logger.error(f"Error while sending leaderboard messages: {e}")
             await ctx.send("An error occurred while setting the leaderboard. Please try again.")
 
     @commands.command(name="reset_leaderboard")
@@ -84,60 +120,83 @@ class Leaderboard(commands.Cog):
         self.leaderboard_channel_id = None
         self.leaderboard_message_id = None
         self.voicelb_message_id = None
+        self.forget_messages()
         save_leaderboard_config(None, None, None)
         await ctx.send("Leaderboard configuration has been reset. You can now set a new leaderboard channel.")
 
-    @tasks.loop(hours=4)
-    async def update_leaderboard(self):
-        """Update the leaderboard messages every 4 hours."""
-        
-        # Update Chat Leaderboard
-        if self.leaderboard_channel_id and self.leaderboard_message_id:
-            channel = self.bot.get_channel(self.leaderboard_channel_id)
-            if not channel:
-                print("Leaderboard channel not found.")
-            else:
-                try:
-                    # Fetch the chat leaderboard message
-                    message = await channel.fetch_message(self.leaderboard_message_id)
-                    if not message:
-                        print("Chat leaderboard message not found.")
-                    else:
-                        # Update the chat leaderboard message
-                        embed = await self.generate_chat_leaderboard_embed()
-                        await message.edit(embed=embed)
-                except discord.NotFound:
-                    print("Chat leaderboard message not found.")
-                except discord.Forbidden:
-                    print("Missing permissions to fetch or edit the message.")
-                except discord.HTTPException as e:
-                    print(f"Failed to update chat leaderboard: {e}")
-        
-        # Update Voice Leaderboard
-        if self.leaderboard_channel_id and self.voicelb_message_id:
+    def board_message(self, board):
+        """Return the message for a board, built once from its ID without fetching it."""
+        message_id = self.leaderboard_message_id if board == "chat" else self.voicelb_message_id
+        if not (self.leaderboard_channel_id and message_id):
+            return None
+
+        message = self.messages.get(board)
+        if message is None or message.id != message_id:
             channel = self.bot.get_channel(self.leaderboard_channel_id)
             if not channel:
-                print("Leaderboard channel not found.")
-            else:
-                try:
-                    # Fetch the voice leaderboard message
-                    message = await channel.fetch_message(self.voicelb_message_id)
-                    if not message:
-                        print("Voice leaderboard message not found.")
-                    else:
-                        # Update the voice leaderboard message
-                        embed = await self.generate_voice_leaderboard_embed()
-                        await message.edit(embed=embed)
-                except discord.NotFound:
-                    print("Voice leaderboard message not found.")
-                except discord.Forbidden:
-                    print("Missing permissions to fetch or edit the message.")
-                except discord.HTTPException as e:
-                    print(f"Failed to update voice leaderboard: {e}")
-
-    async def generate_chat_leaderboard_embed(self):
+                logger.warning("Leaderboard channel not found.")
+                return None
+            message = channel.get_partial_message(message_id)
+            self.messages[board] = message
+        return message
+
+    async def get_top_users(self, board):
+        if board == "chat":
+            return await self.db.get_top_chat_users()
+        return await self.db.get_top_voice_users()
+
+    async def refresh_board(self, board, top_users=None):
+        """Re-render a board and edit its message only if the content changed."""
+        message = self.board_message(board)
+        if message is None:
+            return
+
+        if top_users is None:
+            top_users = await self.get_top_users(board)
+        if board == "chat":
+            embed = await self.generate_chat_leaderboard_embed(top_users)
+        else:
+            embed = await self.generate_voice_leaderboard_embed(top_users)
+
+        self.top_ids[board] = [member_id for member_id, _ in top_users[:9]]
+        digest = embed_digest(embed)
+        if digest == self.digests.get(board):
+            return  # Nothing changed since the last edit
+
+        try:
+            await message.edit(embed=embed)
+            self.digests[board] = digest
+        except discord.NotFound:
+            logger.warning(f"{board.capitalize()} leaderboard message not found.")
+            self.messages.pop(board, None)
+        except discord.Forbidden:
+            logger.error("Missing permissions to edit the message.")
+        except discord.HTTPException as e:
+            logger.error(f"Failed to update {board} leaderboard: {e}")
+
+    @tasks.loop(hours=4)
+    async def update_leaderboard(self):
+        """Update the leaderboard messages (every 4 hours unless configured otherwise)."""
+        for board in BOARDS:
+            await self.refresh_board(board)
+
+    @tasks.loop(seconds=60)
+    async def watch_leaderboard(self):
+        """Edit a board early when its top members or their order change."""
+        for board in BOARDS:
+            top_users = await self.get_top_users(board)
+            if [member_id for member_id, _ in top_users[:9]] != self.top_ids.get(board):
+                await self.refresh_board(board, top_users)
+
+    @update_leaderboard.before_loop
+    @watch_leaderboard.before_loop
+    async def before_leaderboard_loops(self):
+        await self.bot.wait_until_ready()
+
+    async def generate_chat_leaderboard_embed(self, top_users=None):
         """Generate the chat leaderboard embed."""
-        top_users = db_crud.get_top_chat_users()  # Get top chat users from DB
+        if top_users is None:
+            top_users = await self.db.get_top_chat_users()  # Get top chat users from DB
 
         if not top_users:
             return discord.Embed(
@@ -162,12 +221,14 @@ class Leaderboard(commands.Cog):
         # Limit to top 9
         top_users = top_users[:9]
 
+        # Resolve every name at once from the cache (REST only for unknown members)
+        names = await self.bot.names.resolve_many([member_id for member_id, _ in top_users])
+
         # Build the leaderboard description
         description = ""
         for i, (member_id, messages_sent) in enumerate(top_users, start=1):
             emote = rank_emotes.get(i, "")
-            member = self.bot.get_user(member_id)
-            member_name = member.name if member else f"User Left ({member_id})"
+            member_name = names[member_id]
             description += f"{emote} **{member_name}** - {messages_sent} messages\n"
 
         # Create the embed
@@ -180,9 +241,10 @@ class Leaderboard(commands.Cog):
         embed.set_footer(text=f"Last updated: {current_time}")
         return embed
 
-    async def generate_voice_leaderboard_embed(self):
+    async def generate_voice_leaderboard_embed(self, top_users=None):
         """Generate the voice leaderboard embed."""
-        top_users = db_crud.get_top_voice_users()  # Get top voice users from DB
+        if top_users is None:
+            top_users = await self.db.get_top_voice_users()  # Get top voice users from DB
 
         if not top_users:
             return discord.Embed(
@@ -207,12 +269,14 @@ class Leaderboard(commands.Cog):
         # Limit to top 9
         top_users = top_users[:9]
 
+        # Resolve every name at once from the cache (REST only for unknown members)
+        names = await self.bot.names.resolve_many([member_id for member_id, _ in top_users])
+
         # Build the leaderboard description
         description = ""
         for i, (member_id, minutes_spent) in enumerate(top_users, start=1):
             emote = rank_emotes.get(i, "")
-            member = self.bot.get_user(member_id)
-            member_name = member.name if member else f"User Left ({member_id})"
+            member_name = names[member_id]
             description += f"{emote} **{member_name}** - {minutes_spent:.2f} minutes\n"
 
         # Create the embed
@@ -0,0 +1,118 @@
+from discord.ext import commands
+from collections import Counter
+import logging
+import math
+import os
+import time
+from utils.metrics import MetricsServer
+
+# Serve Prometheus metrics on this port (default off), e.g. curl http://127.0.0.1:9108/metrics
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+
+class Metrics(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = logging.getLogger(__name__)
+        self.events = Counter()  # Gateway events received, by type
+        self.server = MetricsServer(self.collect, METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
+
+    async def cog_load(self):
+        if self.server:
+            await self.server.start()
+
+    async def cog_unload(self):
+        if self.server:
+            await self.server.close()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        print(f"{__name__} cog is online")
+
+    @commands.Cog.listener()
+    async def on_socket_event_type(self, event_type):
+        self.events[event_type] += 1
+
+    def latency_metrics(self, kind, prefix, label, what):
+        """Call, error and time counters for one kind of bot.perf stats."""
+        stats = list(self.bot.perf.stats[kind].items())  # Copied: queries are recorded from the database thread
+        return [
+            (f"{prefix}_total", "counter", f"{what} handled.",
+             [({label: name}, window.count) for name, window in stats]),
+            (f"{prefix}_errors_total", "counter", f"{what} that raised.",
+             [({label: name}, window.errors) for name, window in stats]),
+            (f"{prefix}_seconds_total", "counter", f"{what}: total seconds spent.",
+             [({label: name}, round(window.total / 1000, 6)) for name, window in stats]),
+        ]
+
+    def collect(self):
+        bot = self.bot
+        latency = bot.latency
+        metrics = [
+            ("eli_uptime_seconds", "gauge", "Seconds since the bot process started.",
+             [({}, round(time.time() - bot.perf.started, 3))]),
+            ("eli_gateway_latency_seconds", "gauge", "Latency between a gateway heartbeat and its acknowledgement.",
+             [({}, "NaN" if math.isnan(latency) else round(latency, 6))]),
+            ("eli_gateway_events_total", "counter", "Gateway events received, by type.",
+             [({"type": event_type}, count) for event_type, count in sorted(self.events.items())]),
+            *self.latency_metrics("command", "eli_commands", "command", "Commands"),
+            *self.latency_metrics("query", "eli_db_queries", "method", "Database calls"),
+            *self.latency_metrics("http", "eli_discord_requests", "route", "Discord API requests"),
+        ]
+
+        buffer = getattr(bot, "activity_buffer", None)
+        if buffer is not None:
+            metrics.append(("eli_activity_buffer_pending_events", "gauge",
+                            "Messages counted in memory but not yet written.", [({}, buffer.pending_events)]))
+            metrics.append(("eli_activity_buffer_pending_members", "gauge",
+                            "Members with unwritten message counts.", [({}, len(buffer.pending))]))
+        join_queue = getattr(bot, "join_queue", None)
+        if join_queue is not None:
+            metrics.append(("eli_join_queue_pending", "gauge",
+                            "Member joins waiting to be written.", [({}, len(join_queue.pending))]))
+
+        balances = bot.db.balances
+        metrics += [
+            ("eli_balance_cache_hits_total", "counter", "Cash reads served from memory.",
+             [({}, balances.stats["hits"])]),
+            ("eli_balance_cache_misses_total", "counter", "Cash reads that went to the database.",
+             [({}, balances.stats["misses"])]),
+            ("eli_balance_cache_evictions_total", "counter", "Balances dropped for being idle or over the size limit.",
+             [({}, balances.stats["evictions"])]),
+            ("eli_balance_cache_entries", "gauge", "Balances currently cached.", [({}, len(balances))]),
+            ("eli_name_lookups_total", "counter", "Leaderboard names resolved, by where they were found.",
+             [({"source": source}, count) for source, count in bot.names.stats.items()]),
+            ("eli_name_cache_entries", "gauge", "Names currently cached.", [({}, len(bot.names.entries))]),
+        ]
+
+        voice = bot.get_cog("VoiceTracking")
+        if voice is not None:
+            metrics.append(("eli_voice_sessions_active", "gauge", "Members currently being credited voice time.",
+                            [({}, len(voice.user_voice_times))]))
+        gambling = bot.get_cog("Gambling")
+        if gambling is not None:
+            metrics.append(("eli_games_active", "gauge", "Games waiting on a player, by game.",
+                            [({"game": "blackjack"}, len(gambling.tables))]))
+        shards = bot.shard_stats.rows(bot)
+        metrics += [
+            ("eli_shard_latency_seconds", "gauge", "Gateway latency per shard.",
+             [({"shard": shard_id}, round(latency, 6)) for shard_id, latency, *_ in shards if latency is not None]),
+            ("eli_shard_guilds", "gauge", "Guilds per shard.", [({"shard": row[0]}, row[2]) for row in shards]),
+            ("eli_shard_members", "gauge", "Members per shard.", [({"shard": row[0]}, row[3]) for row in shards]),
+        ]
+        for what in ("messages", "connects", "disconnects", "resumes"):
+            metrics.append((f"eli_shard_{what}_total", "counter", f"Gateway {what} per shard.",
+                            [({"shard": row[0]}, row[4][what]) for row in shards]))
+
+        watchdog = getattr(bot, "watchdog", None)
+        if watchdog is not None:
+            metrics.append(("eli_event_loop_lag_seconds", "gauge", "How late the most recent watchdog heartbeat ran.",
+                            [({}, round(watchdog.lags.samples[-1] / 1000, 6) if watchdog.lags.samples else 0)]))
+            metrics.append(("eli_event_loop_stalls_total", "counter", "Times the event loop was blocked past the threshold.",
+                            [({}, watchdog.stall_count)]))
+        return metrics
+
+
+async def setup(bot):
+    await bot.add_cog(Metrics(bot))
@@ -0,0 +1,98 @@
+import discord
+from discord.ext import commands
+import datetime
+import logging
+import math
+import time
+
+
+class Performance(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.perf = bot.perf  # Shared latency stats
+        self.logger = logging.getLogger(__name__)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        print(f"{__name__} cog is online")
+
+    def table(self, kind, limit):
+        rows = []
+        for name, window in self.perf.busiest(kind, limit):
+            p50, p95, p99 = window.percentiles(50, 95, 99)
+            errors = f" err={window.errors}" if window.errors else ""
+            rows.append(f"{name[:34]:<34} {window.count:>7} {p50:>7.2f} {p95:>7.2f} {p99:>7.2f}{errors}")
+        if not rows:
+            return "No calls yet."
+        header = f"{'name':<34} {'calls':>7} {'p50':>7} {'p95':>7} {'p99':>7}"
+        return "```\n" + "\n".join([header, *rows]) + "\n```"
+
+    @commands.command(name="perf")
+    @commands.has_permissions(administrator=True)
+    async def perf_report(self, ctx, kind: str = None, limit: int = 8):
+        """Latency in ms for the busiest commands, database queries and Discord requests: +perf [command|query|http] [limit]"""
+        kinds = [kind] if kind in self.perf.KINDS else list(self.perf.KINDS)
+        uptime = datetime.timedelta(seconds=int(time.time() - self.perf.started))
+        latency = "n/a" if math.isnan(self.bot.latency) else f"{round(self.bot.latency * 1000)}ms"
+
+        embed = discord.Embed(
+            title="Performance",
+            description=f"Rolling window of the last {self.perf.window} calls per name. Up {uptime}, gateway latency {latency}.",
+            color=discord.Color.from_rgb(249,177,181)
+        )
+        titles = {"command": "Commands", "query": "Database", "http": "Discord API"}
+        for name in kinds:
+            embed.add_field(name=titles[name], value=self.table(name, min(limit, 12)), inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command(name="shards")
+    @commands.has_permissions(administrator=True)
+    async def shard_report(self, ctx):
+        """Latency, guilds, members and connection history for each shard this process runs: +shards"""
+        rows = [f"{'shard':>5} {'latency':>8} {'guilds':>6} {'members':>8} {'messages':>9} {'disc':>5} {'resume':>6}"]
+        for shard_id, latency, guilds, members, counts in self.bot.shard_stats.rows(self.bot):
+            shown = f"{latency * 1000:.0f}ms" if latency is not None else "n/a"
+            rows.append(f"{shard_id:>5} {shown:>8} {guilds:>6} {members:>8} {counts['messages']:>9} "
+                        f"{counts['disconnects']:>5} {counts['resumes']:>6}")
+        shard_count = getattr(self.bot, "shard_count", None) or 1
+        embed = discord.Embed(
+            title="Shards",
+            description=f"{len(rows) - 1} of {shard_count} shards in this process.\n```\n" + "\n".join(rows[:26]) + "\n```",
+            color=discord.Color.from_rgb(249,177,181)
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="lag")
+    @commands.has_permissions(administrator=True)
+    async def lag_report(self, ctx, limit: int = 8):
+        """Event-loop lag and the code that blocked it for longer than the threshold: +lag [limit]"""
+        watchdog = self.bot.watchdog
+        p50, p95, p99 = watchdog.lags.percentiles(50, 95, 99)
+        worst = max(watchdog.lags.samples, default=0.0)
+        embed = discord.Embed(
+            title="Event loop lag",
+            description=(f"Heartbeat lateness over the last {len(watchdog.lags.samples)} beats: "
+                         f"p50 {p50:.1f}ms, p95 {p95:.1f}ms, p99 {p99:.1f}ms, max {worst:.1f}ms.\n"
+                         f"{watchdog.stall_count} stalls over {watchdog.threshold * 1000:.0f}ms captured."),
+            color=discord.Color.from_rgb(249,177,181)
+        )
+
+        rows = []
+        for (label, site), count in watchdog.sites.most_common(min(limit, 12)):
+            rows.append(f"{count:>4}x {watchdog.worst[(label, site)]:>7.0f}ms  {label[:30]}\n      {site[:50]}")
+        # An embed field holds 1024 characters, code fence included: drop the rarest sites until it fits
+        while rows and len("\n".join(rows)) > 1024 - len("```\n\n```"):
+            rows.pop()
+        embed.add_field(name="Blocking sites", value="```\n" + "\n".join(rows) + "\n```" if rows else "None yet.", inline=False)
+
+        if watchdog.stalls:
+            last = watchdog.stalls[-1]
+            stack = "".join(last["stack"][-6:])[-900:]
+            when = datetime.datetime.fromtimestamp(last["at"]).strftime("%Y-%m-%d %H:%M:%S")
+            embed.add_field(name=f"Last stall: {last['lag_ms']:.0f}ms in {last['label'][:60]} at {when}",
+                            value=f"```\n{stack}\n```", inline=False)
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Performance(bot))
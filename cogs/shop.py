@@ -1,16 +1,14 @@
 import discord
 from discord.ext import commands
-from db.dbcalls import DiscordBotCrud
 import datetime
 import logging
 from discord.ui import Button, View
 import asyncio
 
-db_crud = DiscordBotCrud()
-
 class Shop(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.db = bot.db  # Shared database service
         self.logger = logging.getLogger(__name__)
 
     @commands.Cog.listener()
@@ -22,7 +20,7 @@ class Shop(commands.Cog):
         member = ctx.author
         member_id = member.id
 
-        inventory = db_crud.get_inventory(member_id)
+        inventory = await self.db.get_inventory(member_id)
 
         if inventory:
             embed = discord.Embed(title="<a:pinktext:1326266668321607710> Inventory", color=discord.Color.from_rgb(249,177,181))
@@ -33,7 +31,7 @@ class Shop(commands.Cog):
             await ctx.send("<:pinkexclamationmark:1326270444679991296> Your inventory is empty.")
 
     async def shop(self, ctx):
-        shop_items = db_crud.get_shop_items()
+        shop_items = await self.db.get_shop_items()
         items_per_page = 10
 
         if not shop_items:
@@ -125,7 +123,7 @@ class Shop(commands.Cog):
             role = None if role_assigned == 'none' else role_assigned
 
             # Step 3: Add the item to the database
-            db_crud.add_shop_item(item_name, item_price, is_consumable, role)
+            await self.db.add_shop_item(item_name, item_price, is_consumable, role)
 
             # Step 4: Confirmation message
             await ctx.send(f"Item '{item_name}' has been added to the shop.")
@@ -140,7 +138,7 @@ class Shop(commands.Cog):
     async def delete_item(self, ctx, item_name):
         try:
             # Attempt to delete the item from the shop
-            item_deleted = db_crud.delete_shop_item(item_name)
+            item_deleted = await self.db.delete_shop_item(item_name)
             
             if item_deleted:
                 await ctx.send(f"<:pinkexclamationmark:1326270444679991296> The item **{item_name}** has been deleted from the shop.")
@@ -156,12 +154,8 @@ class Shop(commands.Cog):
         """Allow users to buy items from the shop."""
         member = ctx.author
 
-        # Normalize the user-provided item name to lowercase for case-insensitive matching
-        normalized_item_name = item_name.lower()
-
-        # Fetch shop items and normalize their names to lowercase for comparison
-        shop_items = db_crud.get_shop_items()
-        item = next((item for item in shop_items if item[0].lower() == normalized_item_name), None)
+        # Item names match in any case
+        item = await self.db.get_shop_item(item_name)
 
         if not item:
             embed = discord.Embed(
@@ -171,10 +165,10 @@ class Shop(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        item_price = item[1]  # Item price
-        cash_balance = db_crud.get_cash(member.id)
+        item_price = item.price  # Item price
 
-        if cash_balance < item_price:
+        # Charges and grants the item in one transaction; None means the balance didn't cover it
+        if await self.db.purchase_item(member.id, item.name) is None:
             embed = discord.Embed(
                 description="<:pinkexclamationmark:1326270444679991296> You don't have enough cash to buy this item.",
                 color=discord.Color.from_rgb(249,177,181)  # Pink color
@@ -182,9 +176,6 @@ class Shop(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        db_crud.remove_cash(member.id, item_price)
-        db_crud.add_inventory_item(member.id, item[0])  # Use the original case for adding to inventory
-
         embed = discord.Embed(
         title="Purchase Successful!",
         description=f"<a:pinktext:1326266668321607710> Congratulations! You have bought **{item_name}** for **{item_price}** cash.",
@@ -225,8 +216,8 @@ class Shop(commands.Cog):
                 return
 
             # Log the addition and add the item to the database
-            print(f"Adding {item_name} 🍀 to Member ID: {member.id}")
-            db_crud.add_inventory_item(member.id, item_name_str)
+            self.logger.info(f"Adding {item_name} 🍀 to Member ID: {member.id}")
+            await self.db.add_inventory_item(member.id, item_name_str)
             logging.info(f"Added {item_name} to Member ID: {member.id}")
 
             embed = discord.Embed(
@@ -271,7 +262,7 @@ class Shop(commands.Cog):
         guild = ctx.guild
 
         try:
-            role_identifier = db_crud.use_inventory_item(member_id, item_name)
+            role_identifier = await self.db.use_inventory_item(member_id, item_name)
 
             if role_identifier:
                 # Check if role_identifier is a name or ID
@@ -314,7 +305,7 @@ class Shop(commands.Cog):
     @commands.command(name='shop')
     @commands.has_permissions(administrator=True)
     async def display_shop(self, ctx):
-        shop_items = db_crud.get_shop_items()
+        shop_items = await self.db.get_shop_items()
 
         if not shop_items:
             await ctx.send("<a:pinktext:1326266668321607710> The shop is currently empty.")
@@ -1,78 +1,172 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
+import logging
+import os
 import time
-import sqlite3
-from datetime import datetime
+
+# Everyone in voice is credited this often, in one transaction that also
+# stores the joins and leaves since the last tick. It is also the most voice
+# time a crash can lose.
+VOICE_FLUSH_SECONDS = float(os.getenv('VOICE_FLUSH_SECONDS', 60))
+XP_PER_MINUTE = 2
 
 class VoiceTracking(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        
-        # Set up a connection to your SQLite database (adjust the path as needed)
-        self.conn = sqlite3.connect('discord_bot.db')  # Replace with your database path
-        self.cursor = self.conn.cursor()
-
-        # Create table if it doesn't exist
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS UserActivity (
-                MemberId INTEGER PRIMARY KEY,
-                MessagesSent INTEGER,
-                LastMessageTime DATETIME,
-                MinutesInVC INTEGER,
-                LastVCTimestamp DATETIME,
-                XP INTEGER
-            )
-        ''')
-        self.conn.commit()
-
-        # A dictionary to store join times for users
+        self.db = bot.db  # Shared database service
+        self.logger = logging.getLogger(__name__)
+
+        # MemberId -> time the session was last credited (its join time until then),
+        # and MemberId -> time the session started. Mirrored in the VoiceSessions
+        # table so sessions survive restarts.
         self.user_voice_times = {}
+        self.session_starts = {}
+
+        # Changes waiting for the next tick: credits for members who left,
+        # MemberId -> (ChannelId, started_at) sessions to store, and MemberIds
+        # whose stored session ended
+        self.pending_credits = []
+        self.pending_opens = {}
+        self.pending_closes = set()
+
+        self.credit_ticker.change_interval(seconds=VOICE_FLUSH_SECONDS)
+        self.credit_ticker.start()
+
+    async def cog_unload(self):
+        # Write the last partial tick so leaves since then aren't lost on shutdown
+        self.credit_ticker.cancel()
+        await self.flush_sessions()
 
-    # Helper function to update user's VC time and XP in the database
-    def update_vc_time(self, member_id, time_spent):
-        self.cursor.execute('''
-            SELECT MinutesInVC, XP FROM UserActivity WHERE MemberId = ?
-        ''', (member_id,))
-        result = self.cursor.fetchone()
-
-        xp_earned = int(time_spent * 2)  # XP is 2 per minute
-
-        if result:
-            # Update the MinutesInVC and XP if the user already exists
-            new_time = result[0] + time_spent
-            new_xp = result[1] + xp_earned
-            self.cursor.execute('''
-                UPDATE UserActivity SET MinutesInVC = ?, XP = ?, LastVCTimestamp = ? WHERE MemberId = ?
-            ''', (new_time, new_xp, datetime.now(), member_id))
-        else:
-            # If the user doesn't exist in the database, insert a new entry
-            self.cursor.execute('''
-                INSERT INTO UserActivity (MemberId, MinutesInVC, LastVCTimestamp, XP) VALUES (?, ?, ?, ?)
-            ''', (member_id, time_spent, datetime.now(), xp_earned))
-        
-        self.conn.commit()
+    @staticmethod
+    def credit(member_id, since, until, started):
+        """Build a (MemberId, minutes, xp) credit for the voice time between two marks.
+
+        XP is counted on the whole session so far, less what earlier credits
+        already gave, so the fractions cut off at each tick add up instead of
+        being lost.
+        """
+        minutes = max(until - since, 0) / 60
+        xp = int(max(until - started, 0) / 60 * XP_PER_MINUTE) - int(max(since - started, 0) / 60 * XP_PER_MINUTE)
+        return member_id, minutes, xp  # XP is 2 per minute
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
         # Check if the user has joined a voice channel
         if before.channel is None and after.channel is not None:
             # User joined a voice channel
-            self.user_voice_times[member.id] = time.time()  # Store the current time when they join
-        
+            now = time.time()
+            self.user_voice_times[member.id] = now  # Store the current time when they join
+            self.session_starts[member.id] = now
+            self.pending_opens[member.id] = (after.channel.id, now)  # Stored on the next tick
+
         # Check if the user has left a voice channel
         elif before.channel is not None and after.channel is None:
             # User left a voice channel
             if member.id in self.user_voice_times:
-                join_time = self.user_voice_times.pop(member.id)  # Get and remove the join time
-                time_spent = (time.time() - join_time) / 60  # Time spent in VC in minutes
-                print(f"{member.name} spent {time_spent:.2f} minutes in the voice channel.")
-                
-                # Update the database with the time spent and earned XP
-                self.update_vc_time(member.id, time_spent)
+                credited_until = self.user_voice_times.pop(member.id)  # Get and remove the last credit time
+                started = self.session_starts.pop(member.id, credited_until)
+                member_id, time_spent, xp_earned = self.credit(member.id, credited_until, time.time(), started)
+                self.logger.debug(f"{member.name} spent {time_spent:.2f} more minutes in the voice channel.",
+                                  extra={"member_id": member_id, "minutes": round(time_spent, 2)})
+
+                # Credit the time since the last tick and close the stored session, on the next tick
+                self.pending_credits.append((member_id, time_spent, xp_earned))
+                self.pending_opens.pop(member_id, None)
+                self.pending_closes.add(member_id)
+
+        # Check if the user moved to another voice channel (mute and deafen changes keep the channel)
+        elif before.channel is not None and after.channel is not None and before.channel.id != after.channel.id:
+            # Same session, stored again with the new channel on the next tick
+            if member.id not in self.user_voice_times:
+                now = time.time()  # Joined before the bot was tracking them
+                self.user_voice_times[member.id] = now
+                self.session_starts[member.id] = now
+            self.pending_opens[member.id] = (after.channel.id, self.session_starts[member.id])
+
+    @tasks.loop(seconds=60)
+    async def credit_ticker(self):
+        await self.flush_sessions()
+
+    async def flush_sessions(self):
+        """Credit elapsed minutes and XP to everyone in voice and store the joins and
+        leaves since the last tick, in one transaction."""
+        if not (self.user_voice_times or self.pending_credits or self.pending_closes):
+            return
+
+        now = time.time()
+        previous = dict(self.user_voice_times)
+        left, opened, closed = self.pending_credits, self.pending_opens, self.pending_closes
+        self.pending_credits, self.pending_opens, self.pending_closes = [], {}, set()
+        ticked = [self.credit(member_id, since, now, self.session_starts.get(member_id, since))
+                  for member_id, since in previous.items()]
+
+        # Move the credit marks before awaiting, so a leave during the write
+        # only credits the time after this tick
+        for member_id in previous:
+            self.user_voice_times[member_id] = now
+
+        sessions = [(member_id, channel_id, started) for member_id, (channel_id, started) in opened.items()]
+        if not await self.db.credit_voice_sessions(left + ticked, now, sessions, list(closed)):
+            # Put everything back for the next tick
+            self.pending_credits[:0] = left
+            for credit in ticked:
+                member_id = credit[0]
+                if self.user_voice_times.get(member_id) == now:
+                    self.user_voice_times[member_id] = previous[member_id]
+                else:
+                    self.pending_credits.append(credit)  # They left during the write
+            self.pending_closes |= closed
+            for member_id, session in opened.items():
+                if member_id in self.user_voice_times:  # Not if they left during the write
+                    self.pending_opens.setdefault(member_id, session)
+
+    async def reconcile_sessions(self):
+        """Match stored sessions against who is in voice right now, in one pass.
+
+        Runs on every ready, including reconnects. Members still being tracked
+        keep their session and credit mark. Members in voice with a stored
+        session from before a restart continue it from its stored start; the
+        time the bot was down isn't credited, since nobody saw them in voice.
+        Anyone else in voice starts a fresh session, and stored sessions of
+        members no longer in voice are dropped: they were credited up to the
+        last tick, or up to shutdown (the cog flushes when it unloads).
+        """
+        await self.flush_sessions()  # So the stored sessions are up to date
+        stored = await self.db.get_voice_sessions()
+        now = time.time()
+
+        # A shard group process only owns the sessions in its own guilds' channels
+        channel_ids = None
+        if getattr(self.bot, "shard_ids", None) is not None:
+            channel_ids = [channel.id for guild in self.bot.guilds for channel in guild.voice_channels]
+            owned = set(channel_ids)
+            stored = [session for session in stored if session[1] in owned]
+        started_at = {member_id: started for member_id, channel_id, started, credited_until in stored}
+
+        live = {member.id: channel.id
+                for guild in self.bot.guilds
+                for channel in guild.voice_channels
+                for member in channel.members}
+
+        for member_id in set(self.user_voice_times) - set(live):
+            del self.user_voice_times[member_id]
+            self.session_starts.pop(member_id, None)
+        resumed = 0
+        for member_id in live:
+            if member_id not in self.user_voice_times:
+                self.user_voice_times[member_id] = now
+                self.session_starts[member_id] = started_at.get(member_id, now)
+                resumed += member_id in started_at
+        opened = [(member_id, channel_id, self.session_starts[member_id], self.user_voice_times[member_id])
+                  for member_id, channel_id in live.items()]
+
+        if await self.db.reconcile_voice_sessions(opened, channel_ids):
+            self.logger.info(f"Voice sessions reconciled: {len(opened)} in voice, {resumed} resumed after a restart.")
 
     @commands.Cog.listener()
     async def on_ready(self):
-        print(f'{self.bot.user} has connected to Discord.')
+        self.logger.info(f'{self.bot.user} has connected to Discord.')
+        await self.reconcile_sessions()
 
 async def setup(bot):
    await bot.add_cog(VoiceTracking(bot))
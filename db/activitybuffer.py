@@ -0,0 +1,61 @@
+from datetime import datetime
+
+
+class ActivityBuffer:
+    """Coalesce per-member message and XP deltas in memory and write them in batches.
+
+    Counting a message is a dict update; the database only sees one
+    ``executemany`` UPSERT per flush. Anything recorded since the last flush is
+    lost if the process dies, so ``flush_interval`` is the durability window.
+    """
+
+    def __init__(self, db, flush_interval=5.0, max_pending=500):
+        self.db = db
+        self.flush_interval = flush_interval  # Seconds between timed flushes
+        self.max_pending = max_pending        # Events that force an early flush
+
+        # MemberId -> [messages, xp, last message time]
+        self.pending = {}
+        self.pending_events = 0
+
+    def record_message(self, member_id, xp=1):
+        """Count one message for a member. Returns True when a flush is due."""
+        now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        entry = self.pending.get(member_id)
+        if entry is None:
+            self.pending[member_id] = [1, xp, now]
+        else:
+            entry[0] += 1
+            entry[1] += xp
+            entry[2] = now
+
+        self.pending_events += 1
+        return self.pending_events >= self.max_pending
+
+    def _requeue(self, rows):
+        """Merge rows from a failed flush back into the pending deltas."""
+        for member_id, messages, xp, last_time in rows:
+            entry = self.pending.get(member_id)
+            if entry is None:
+                self.pending[member_id] = [messages, xp, last_time]
+            else:
+                entry[0] += messages
+                entry[1] += xp
+                entry[2] = max(entry[2], last_time)
+            self.pending_events += messages
+
+    async def flush(self):
+        """Write all pending deltas in one transaction. Returns the number of members written."""
+        if not self.pending:
+            return 0
+
+        rows = [(member_id, messages, xp, last_time)
+                for member_id, (messages, xp, last_time) in self.pending.items()]
+        self.pending = {}
+        self.pending_events = 0
+
+        if not await self.db.apply_activity_deltas(rows):
+            # Keep the deltas so the next flush retries them
+            self._requeue(rows)
+            return 0
+        return len(rows)
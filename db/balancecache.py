@@ -0,0 +1,48 @@
+import time
+from collections import OrderedDict
+
+
+class BalanceCache:
+    """Cash balances kept in memory, so economy commands don't read Money.
+
+    Balances are filled on a read miss and overwritten with the balance every
+    ledger write returns, so the cache never holds a value the database has
+    moved past. Members unused for ``idle`` seconds, or past ``maxsize``, are
+    evicted least recently used first.
+    """
+
+    def __init__(self, maxsize=4096, idle=1800):
+        self.maxsize = maxsize
+        self.idle = idle  # Seconds an unused balance stays cached
+        self.entries = OrderedDict()  # MemberId -> (cash, last_used)
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, member_id):
+        """Return a cached balance, or None on a miss."""
+        entry = self.entries.get(member_id)
+        now = time.monotonic()
+        if entry is None or entry[1] + self.idle < now:
+            if entry is not None:
+                del self.entries[member_id]
+                self.stats["evictions"] += 1
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.entries[member_id] = (entry[0], now)
+        self.entries.move_to_end(member_id)
+        return entry[0]
+
+    def put(self, member_id, cash):
+        """Store a member's current balance."""
+        self.entries[member_id] = (cash, time.monotonic())
+        self.entries.move_to_end(member_id)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, member_id):
+        """Forget a balance that changed outside the ledger."""
+        self.entries.pop(member_id, None)
@@ -0,0 +1,39 @@
+from collections import namedtuple
+
+ShopItem = namedtuple("ShopItem", "item_id name price consumable role")
+
+
+class ShopCatalog:
+    """The Shop table held in memory, with a case-insensitive name index.
+
+    The shop is small and rarely changes, so it is loaded once and reloaded
+    whenever an item is added or deleted. Looking an item up by name is a dict
+    lookup on the casefolded name instead of a query.
+    """
+
+    def __init__(self):
+        self.items = {}  # ItemId -> ShopItem, in ItemId order
+        self.by_name = {}  # casefolded name -> ItemId
+
+    def __len__(self):
+        return len(self.items)
+
+    def load(self, rows):
+        """Replace the catalog with (ItemId, ItemName, ItemPrice, ItemConsumable, RoleAssigned) rows, in ItemId order."""
+        self.items = {}
+        self.by_name = {}
+        for row in rows:
+            item = ShopItem(row[0], row[1], row[2], bool(row[3]), row[4])
+            self.items[item.item_id] = item
+            # Names that only differ in case resolve to the oldest item, as the linear scan did
+            if item.name:
+                self.by_name.setdefault(item.name.casefold(), item.item_id)
+
+    def find(self, name):
+        """Return the ShopItem with this name (any case), or None."""
+        item_id = self.by_name.get(name.casefold())
+        return self.items.get(item_id) if item_id is not None else None
+
+    def all(self):
+        """Return every item, oldest first."""
+        return list(self.items.values())
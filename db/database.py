@@ -1,100 +1,81 @@
+import logging
 import sqlite3
+from db.migrations import migrate
+
+# Pragmas applied on every connect. WAL lets leaderboard and +stats reads run
+# while messages and voice time are being written, and synchronous=NORMAL only
+# fsyncs the WAL at checkpoints instead of on every commit.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,  # 256 MiB
+    "cache_size": -65536,    # Negative means KiB, so 64 MiB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,    # Milliseconds to wait on a locked database
+    "foreign_keys": "ON",
+}
+
+# Prepared statements kept per connection (sqlite3 defaults to 128)
+DEFAULT_CACHED_STATEMENTS = 512
+
+
+def parse_pragmas(text):
+    """Parse overrides such as "synchronous=FULL;mmap_size=0" into a dict."""
+    pragmas = {}
+    for part in text.replace(",", ";").split(";"):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            pragmas[name.strip().lower()] = value.strip()
+    return pragmas
+
 
 class DiscordBotDatabase:
-    def __init__(self, db_name="discord_bot.db"):
+    def __init__(self, db_name="discord_bot.db", pragmas=None, cached_statements=DEFAULT_CACHED_STATEMENTS):
         self.db_name = db_name
         self.connection = None
+        self.logger = logging.getLogger(__name__)
+        # Overrides are merged on top of the default profile
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.cached_statements = cached_statements
 
     def connect(self):
-        """Establish a connection to the database."""
+        """Establish a connection to the database and apply the pragma profile."""
         try:
-            self.connection = sqlite3.connect(self.db_name)
-            # Enable foreign key constraints
-            self.connection.execute('PRAGMA foreign_keys = ON;')
-            print(f"Connected to database: {self.db_name}")
+            self.connection = sqlite3.connect(self.db_name, cached_statements=self.cached_statements)
+            for name, value in self.pragmas.items():
+                self.connection.execute(f"PRAGMA {name} = {value};")
+            self.logger.info(f"Connected to database: {self.db_name} (journal_mode={self.pragma('journal_mode')})")
         except sqlite3.Error as e:
-            print(f"Error connecting to database: {e}")
+            self.logger.error(f"Error connecting to database: {e}")
             raise
 
-    def create_tables(self):
-        """Create the necessary tables for the bot."""
-        if not self.connection:
-            raise ValueError("No connection to the database. Call connect() first.")
-        
-        cursor = self.connection.cursor()
+    def pragma(self, name):
+        """Return the current value of a pragma on this connection."""
+        row = self.connection.execute(f"PRAGMA {name};").fetchone()
+        return row[0] if row else None
 
-        # SQL queries for creating tables
-        CREATE_QUERIES = [
-            '''
-            CREATE TABLE IF NOT EXISTS Members (
-                MemberId INTEGER PRIMARY KEY
-            );
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS UserActivity (
-                MemberId INTEGER,
-                MessagesSent INTEGER DEFAULT 0,
-                MinutesInVC INTEGER DEFAULT 0,
-                XP INTEGER DEFAULT 0,
-                FOREIGN KEY (MemberId) REFERENCES Members(MemberId)
-            );
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS Money (
-                MemberId INTEGER,
-                Cash INTEGER DEFAULT 0,
-                FOREIGN KEY (MemberId) REFERENCES Members(MemberId)
-            );
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS Income (
-                MemberId INTEGER,
-                Cash INTEGER DEFAULT 0,
-                LastDailyClaim TEXT,
-                LastWeeklyClaim TEXT,
-                FOREIGN KEY (MemberId) REFERENCES Members(MemberId)
-            );
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS Shop (
-                ItemId INTEGER PRIMARY KEY,
-                ItemName TEXT,
-                ItemPrice INTEGER,
-                ItemConsumable BOOLEAN,
-                RoleAssigned INTEGER
-            );
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS Inventory (
-                MemberId INTEGER,
-                ItemId INTEGER,
-                Quantity INTEGER DEFAULT 1,
-                FOREIGN KEY (MemberId) REFERENCES Members(MemberId),
-                FOREIGN KEY (ItemId) REFERENCES Shop(ItemId)
-            );
-            '''
-        ]
+    def checkpoint(self, mode="PASSIVE"):
+        """Copy WAL frames back into the database file so the WAL stays small.
 
-        try:
-            # Run all the queries to create the tables
-            for query in CREATE_QUERIES:
-                cursor.execute(query)
+        Returns (busy, wal_frames, checkpointed_frames) as reported by sqlite.
+        """
+        if not self.connection:
+            raise ValueError("No connection to the database. Call connect() first.")
+        return self.connection.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
 
-            # Commit the changes to the database
-            self.connection.commit()
-            print("Tables created successfully.")
-        except sqlite3.Error as e:
-            print(f"Error creating tables: {e}")
-            self.connection.rollback()
+    def create_tables(self):
+        """Bring the schema up to date by running any pending migrations."""
+        if not self.connection:
+            raise ValueError("No connection to the database. Call connect() first.")
 
-    
+        return migrate(self.connection)
 
     def close(self):
         """Close the database connection."""
         if self.connection:
             try:
                 self.connection.close()
-                print("Database connection closed.")
+                self.logger.info("Database connection closed.")
             except sqlite3.Error as e:
-                print(f"Error closing database connection: {e}")
+                self.logger.error(f"Error closing database connection: {e}")
 
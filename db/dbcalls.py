@@ -1,53 +1,126 @@
+import logging
 import sqlite3
 from db.database import DiscordBotDatabase
+from db.catalog import ShopCatalog
+from db.rankings import ScoreIndex
+import calendar
 import datetime
 import time
 
+# Activity bucket sizes in seconds. Hourly buckets older than HOURLY_RETENTION are
+# rolled up into daily ones, and daily buckets older than DAILY_RETENTION are
+# dropped (lifetime totals stay in UserActivity).
+HOUR = 3600
+DAY = 86400
+HOURLY_RETENTION = 2 * DAY
+DAILY_RETENTION = 35 * DAY
+
+# Rows per transaction when adding or syncing members in bulk
+MEMBER_CHUNK = 5000
+# Members per IN (...) lookup; old sqlite builds allow 999 parameters per statement
+LOOKUP_CHUNK = 500
+
+
+def bucket_start(timestamp, size=HOUR):
+    """Align a unix timestamp to the start of its bucket."""
+    return int(timestamp) // size * size
+
 class DiscordBotCrud:
-    def __init__(self, db_name="discord_bot.db"):
+    def __init__(self, db_name="discord_bot.db", pragmas=None):
         """Initialize the CRUD class with the database connection."""
-        self.db = DiscordBotDatabase(db_name)
+        self.logger = logging.getLogger(__name__)
+        self.db = DiscordBotDatabase(db_name, pragmas)
         self.db.connect()
         self.ensure_table_exists()
 
+        # In-memory leaderboards, loaded once and kept in step with every write below
+        self.rankings = {metric: ScoreIndex() for metric in ("XP", "MessagesSent", "MinutesInVC", "Cash")}
+        self.load_rankings()
+
+        # The shop, reloaded whenever an item is added or deleted
+        self.catalog = ShopCatalog()
+        self.load_catalog()
+
         # Dictionary to store join times for users
         self.user_voice_times = {}
 
-    def ensure_table_exists(self):
-        """Ensure that the Members table exists."""
+    def load_rankings(self):
+        """Load the leaderboard indexes from the database, leaving out members who left."""
+        present = "MemberId NOT IN (SELECT MemberId FROM Members WHERE LeftAt IS NOT NULL)"
         cursor = self.db.connection.cursor()
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Members (
-            MemberId INTEGER PRIMARY KEY
-        );
-        """)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS UserActivity (
-            MemberId INTEGER PRIMARY KEY,
-            MessagesSent INTEGER DEFAULT 0,
-            XP INTEGER DEFAULT 0,
-            LastMessageTime DATETIME DEFAULT CURRENT_TIMESTAMP,
-            LastVCTimestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            MinutesInVC INTEGER DEFAULT 0
-        );
-        """)
-        cursor.execute("PRAGMA foreign_keys = ON;")
-        self.db.connection.commit()
+        try:
+            for metric in ("XP", "MessagesSent", "MinutesInVC"):
+                cursor.execute(f"SELECT MemberId, {metric} FROM UserActivity WHERE {present};")
+                self.rankings[metric].load(cursor.fetchall())
+            cursor.execute(f"SELECT MemberId, Cash FROM Money WHERE {present};")
+            self.rankings["Cash"].load(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def _rank_members(self, cursor, member_ids):
+        """Put members on the leaderboards with their stored scores, e.g. when they come back."""
+        member_ids = [member_id for member_id in dict.fromkeys(member_ids) if member_id not in self.rankings["XP"].scores]
+        for index in self.rankings.values():
+            index.ensure(member_ids)  # New members all start at 0, indexed in one batch
+        for start in range(0, len(member_ids), LOOKUP_CHUNK):
+            chunk = member_ids[start:start + LOOKUP_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(f"""
+                SELECT m.MemberId, a.XP, a.MessagesSent, a.MinutesInVC, c.Cash FROM Members m
+                LEFT JOIN UserActivity a ON a.MemberId = m.MemberId
+                LEFT JOIN Money c ON c.MemberId = m.MemberId
+                WHERE m.MemberId IN ({placeholders});
+            """, chunk)
+            for member_id, *scores in cursor.fetchall():
+                for metric, score in zip(("XP", "MessagesSent", "MinutesInVC", "Cash"), scores):
+                    if score:
+                        self.rankings[metric].set(member_id, score)
+
+    def load_catalog(self):
+        """Load the shop catalog from the database."""
+        cursor = self.db.connection.cursor()
+        try:
+            cursor.execute("SELECT ItemId, ItemName, ItemPrice, ItemConsumable, RoleAssigned FROM Shop ORDER BY ItemId;")
+            self.catalog.load(cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def get_rank(self, member_id, metric="XP"):
+        """Return (rank, score) for a member on a leaderboard, or (None, None) if they aren't on it."""
+        index = self.rankings[metric]
+        rank = index.rank(member_id)
+        return (rank, index.scores[member_id]) if rank else (None, None)
+
+    def close(self):
+        """Close the database connection."""
+        self.db.close()
+
+    def ensure_table_exists(self):
+        """Ensure that every table exists and the schema is current."""
+        self.db.create_tables()
+
+    def checkpoint(self):
+        """Checkpoint the write-ahead log."""
+        try:
+            return self.db.checkpoint()
+        except sqlite3.Error as e:
+            self.logger.error(f"Error checkpointing database: {e}")
+            return None
 
     def add_member(self, member_id):
         """Add a new member to the Members and UserActivity tables."""
         try:
             cursor = self.db.connection.cursor()
-            cursor.execute("INSERT OR IGNORE INTO Members (MemberId) VALUES (?);", (member_id,))
+            cursor.execute("INSERT INTO Members (MemberId) VALUES (?) ON CONFLICT(MemberId) DO UPDATE SET LeftAt = NULL;", (member_id,))
             cursor.execute("INSERT OR IGNORE INTO UserActivity (MemberId) VALUES (?);", (member_id,))# Add entry to UserActivity table
             cursor.execute("INSERT OR IGNORE INTO Income (MemberId) VALUES (?);", (member_id,))  # add entry to income table
             cursor.execute("INSERT OR IGNORE INTO Money (MemberId) VALUES (?);", (member_id,)) # add entry into money table 
-            cursor.execute("INSERT OR IGNORE INTO Inventory (MemberId) VALUES (?);", (member_id,)) # add entry into inventory
 
             self.db.connection.commit()
-            print(f"Member {member_id} added.")
+            self._rank_members(cursor, [member_id])
+            self.logger.info(f"Member {member_id} added.", extra={"member_id": member_id})
         except sqlite3.DatabaseError as e:
-            print(f"Error adding member {member_id}: {e}")
+            self.logger.error(f"Error adding member {member_id}: {e}")
             self.db.connection.rollback()
 
     def remove_member(self, member_id):
@@ -64,12 +137,96 @@ class DiscordBotCrud:
             # Now remove from the Members table
             cursor.execute("DELETE FROM Members WHERE MemberId = ?;", (member_id,))
             self.db.connection.commit()
+            for index in self.rankings.values():
+                index.discard(member_id)
 
-            print(f"Member {member_id} and related data removed.")
+            self.logger.info(f"Member {member_id} and related data removed.", extra={"member_id": member_id})
         except sqlite3.DatabaseError as e:
-            print(f"Error removing member {member_id}: {e}")
+            self.logger.error(f"Error removing member {member_id}: {e}")
             self.db.connection.rollback()
 
+    def add_members(self, members):
+        """Add (MemberId, Name) pairs in chunked transactions, re-activating members who had left.
+
+        Existing rows keep their data; a None name leaves the stored name alone.
+        """
+        members = list(members)
+        try:
+            cursor = self.db.connection.cursor()
+            for start in range(0, len(members), MEMBER_CHUNK):
+                chunk = members[start:start + MEMBER_CHUNK]
+                ids = [(member_id,) for member_id, name in chunk]
+                with self.db.connection:
+                    cursor.executemany('''
+                        INSERT INTO Members (MemberId, Name) VALUES (?, ?)
+                        ON CONFLICT(MemberId) DO UPDATE SET Name = COALESCE(excluded.Name, Name), LeftAt = NULL;
+                    ''', chunk)
+                    cursor.executemany("INSERT OR IGNORE INTO UserActivity (MemberId) VALUES (?);", ids)
+                    cursor.executemany("INSERT OR IGNORE INTO Income (MemberId) VALUES (?);", ids)
+                    cursor.executemany("INSERT OR IGNORE INTO Money (MemberId) VALUES (?);", ids)
+                self._rank_members(cursor, [member_id for member_id, name in chunk])
+            return True
+        except sqlite3.Error as e:
+            self.logger.error(f"Error adding members: {e}")
+            return False
+        finally:
+            cursor.close()
+
+    def sync_members(self, members, mark_departed=True):
+        """Make the Members table match the (MemberId, Name) pairs currently in the guilds.
+
+        New members get their rows, returning members and renamed members are
+        updated, and members no longer present are marked with LeftAt (their
+        data is kept). Only the difference is written. Returns (added, departed).
+        """
+        cursor = self.db.connection.cursor()
+        try:
+            cursor.execute("SELECT MemberId, Name, LeftAt FROM Members;")
+            stored = {member_id: (name, left_at) for member_id, name, left_at in cursor.fetchall()}
+
+            present = dict(members)
+            changed = [(member_id, name) for member_id, name in present.items()
+                       if member_id not in stored
+                       or stored[member_id][1] is not None
+                       or (name is not None and stored[member_id][0] != name)]
+            added = sum(1 for member_id, name in changed if member_id not in stored)
+            departed = [member_id for member_id, (name, left_at) in stored.items()
+                        if left_at is None and member_id not in present] if mark_departed else []
+
+            if changed and not self.add_members(changed):
+                return 0, 0
+            if departed and not self.mark_members_left(departed):
+                return added, 0
+            return added, len(departed)
+        except sqlite3.Error as e:
+            self.logger.error(f"Error syncing members: {e}")
+            return 0, 0
+        finally:
+            cursor.close()
+
+    def mark_members_left(self, member_ids):
+        """Mark members as having left the server with LeftAt, in chunked transactions.
+
+        Their data is kept but they drop off the leaderboards, until add_member
+        or add_members clears LeftAt when they come back.
+        """
+        rows = [(member_id,) for member_id in member_ids]
+        try:
+            cursor = self.db.connection.cursor()
+            for start in range(0, len(rows), MEMBER_CHUNK):
+                with self.db.connection:
+                    cursor.executemany(
+                        "UPDATE Members SET LeftAt = CURRENT_TIMESTAMP WHERE MemberId = ? AND LeftAt IS NULL;",
+                        rows[start:start + MEMBER_CHUNK],
+                    )
+                for (member_id,) in rows[start:start + MEMBER_CHUNK]:
+                    for index in self.rankings.values():
+                        index.discard(member_id)
+            return True
+        except sqlite3.Error as e:
+            self.logger.error(f"Error marking members as left: {e}")
+            return False
+
     def get_member(self, member_id):
         """Retrieve member information from the Members table."""
         try:
@@ -77,9 +234,36 @@ class DiscordBotCrud:
             cursor.execute("SELECT * FROM Members WHERE MemberId = ?", (member_id,))
             return cursor.fetchone()
         except sqlite3.DatabaseError as e:
-            print(f"Error retrieving member {member_id}: {e}")
+            self.logger.error(f"Error retrieving member {member_id}: {e}")
             return None
 
+    def get_member_names(self, member_ids):
+        """Return {MemberId: name} for the members that have a stored name."""
+        member_ids = list(member_ids)
+        if not member_ids:
+            return {}
+        try:
+            cursor = self.db.connection.cursor()
+            placeholders = ", ".join("?" for _ in member_ids)
+            cursor.execute(f"SELECT MemberId, Name FROM Members WHERE Name IS NOT NULL AND MemberId IN ({placeholders});", member_ids)
+            return dict(cursor.fetchall())
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error: {e}")
+            return {}
+        finally:
+            cursor.close()
+
+    def set_member_names(self, names):
+        """Store names from a {MemberId: name} dict for members already in the database."""
+        try:
+            with self.db.connection:
+                self.db.connection.executemany(
+                    "UPDATE Members SET Name = ? WHERE MemberId = ?;",
+                    [(name, member_id) for member_id, name in names.items()],
+                )
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error: {e}")
+
     def increment_messages_sent(self, member_id):
         try:
             cursor = self.db.connection.cursor()
@@ -102,17 +286,147 @@ class DiscordBotCrud:
                 """, (member_id,))
 
             self.db.connection.commit()
+            self.rankings["MessagesSent"].add(member_id, 1)
+            self.rankings["XP"].add(member_id, 1)
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error: {e}")
+        finally:
+            cursor.close()
+
+    def apply_activity_deltas(self, rows):
+        """Add buffered (MemberId, messages, xp, last message time) deltas in a single transaction."""
+        try:
+            with self.db.connection:
+                self.db.connection.executemany("""
+                    INSERT INTO UserActivity (MemberId, MessagesSent, XP, LastMessageTime)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(MemberId) DO UPDATE SET
+                        MessagesSent = MessagesSent + excluded.MessagesSent,
+                        XP = XP + excluded.XP,
+                        LastMessageTime = excluded.LastMessageTime;
+                """, rows)
+                self.db.connection.executemany("""
+                    INSERT INTO ActivityBuckets (BucketStart, BucketSize, MemberId, MessagesSent)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(BucketStart, BucketSize, MemberId) DO UPDATE SET
+                        MessagesSent = MessagesSent + excluded.MessagesSent;
+                """, [
+                    (bucket_start(calendar.timegm(time.strptime(last_time, "%Y-%m-%d %H:%M:%S"))), HOUR, member_id, messages)
+                    for member_id, messages, xp, last_time in rows
+                ])
+            for member_id, messages, xp, last_time in rows:
+                self.rankings["MessagesSent"].add(member_id, messages)
+                self.rankings["XP"].add(member_id, xp)
+            return True
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error while flushing activity: {e}")
+            return False
+
+    def _credit_voice(self, rows):
+        """Add (MemberId, minutes, xp) voice credits. Runs inside the caller's transaction."""
+        now = time.time()
+        self.db.connection.executemany("""
+            INSERT INTO UserActivity (MemberId, MinutesInVC, XP, LastVCTimestamp)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(MemberId) DO UPDATE SET
+                MinutesInVC = MinutesInVC + excluded.MinutesInVC,
+                XP = XP + excluded.XP,
+                LastVCTimestamp = excluded.LastVCTimestamp;
+        """, rows)
+        self.db.connection.executemany("""
+            INSERT INTO ActivityBuckets (BucketStart, BucketSize, MemberId, MinutesInVC)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(BucketStart, BucketSize, MemberId) DO UPDATE SET
+                MinutesInVC = MinutesInVC + excluded.MinutesInVC;
+        """, [(bucket_start(now), HOUR, member_id, minutes) for member_id, minutes, xp in rows])
+
+    def _rank_voice(self, rows):
+        """Apply committed voice credits to the leaderboard indexes."""
+        for member_id, minutes, xp in rows:
+            self.rankings["MinutesInVC"].add(member_id, minutes)
+            self.rankings["XP"].add(member_id, xp)
+
+    def add_voice_time(self, member_id, minutes, xp):
+        """Credit time spent in voice chat and the XP earned for it."""
+        try:
+            with self.db.connection:
+                self._credit_voice([(member_id, minutes, xp)])
+            self._rank_voice([(member_id, minutes, xp)])
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error: {e}")
+
+    def get_voice_sessions(self):
+        """Return open voice sessions as (MemberId, ChannelId, StartedAt, CreditedUntil) rows."""
+        try:
+            cursor = self.db.connection.cursor()
+            cursor.execute("SELECT MemberId, ChannelId, StartedAt, CreditedUntil FROM VoiceSessions;")
+            return cursor.fetchall()
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
+            self.logger.error(f"Database error: {e}")
+            return []
         finally:
             cursor.close()
 
+    def credit_voice_sessions(self, credits, now, opened=(), closed=()):
+        """Apply one voice tick in one transaction.
+
+        `credits` are (MemberId, minutes, xp) for sessions credited up to `now`
+        and for sessions that ended since the last tick; `opened` are
+        (MemberId, ChannelId, started_at) sessions to store, and `closed` are
+        MemberIds whose stored session ended. A member may be in both when they
+        left and came back within one tick.
+        """
+        try:
+            with self.db.connection:
+                self._credit_voice(credits)
+                self.db.connection.executemany("DELETE FROM VoiceSessions WHERE MemberId = ?;",
+                                               [(member_id,) for member_id in closed])
+                self.db.connection.executemany("""
+                    INSERT OR REPLACE INTO VoiceSessions (MemberId, ChannelId, StartedAt, CreditedUntil)
+                    VALUES (?, ?, ?, ?);
+                """, [(member_id, channel_id, started, started) for member_id, channel_id, started in opened])
+                self.db.connection.executemany(
+                    "UPDATE VoiceSessions SET CreditedUntil = ? WHERE MemberId = ?;",
+                    [(now, member_id) for member_id, minutes, xp in credits],
+                )
+            self._rank_voice(credits)
+            return True
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error while crediting voice time: {e}")
+            return False
+
+    def reconcile_voice_sessions(self, opened, channel_ids=None):
+        """Replace all open sessions after a restart or reconnect, in one transaction.
+
+        `opened` are (MemberId, ChannelId, started_at, credited_until) for
+        members in voice right now. With `channel_ids`, only sessions in those
+        channels are replaced (a shard group owns just its own guilds'
+        sessions).
+        """
+        try:
+            with self.db.connection:
+                if channel_ids is None:
+                    self.db.connection.execute("DELETE FROM VoiceSessions;")
+                else:
+                    self.db.connection.executemany("DELETE FROM VoiceSessions WHERE ChannelId = ?;",
+                                                   [(channel_id,) for channel_id in channel_ids])
+                self.db.connection.executemany("""
+                    INSERT OR REPLACE INTO VoiceSessions (MemberId, ChannelId, StartedAt, CreditedUntil)
+                    VALUES (?, ?, ?, ?);
+                """, opened)
+            return True
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error while reconciling voice sessions: {e}")
+            return False
+
     def update_xp(self, member_id, new_xp):
         """Update the user's XP in the database."""
         cursor = self.db.connection.cursor()
         cursor.execute("UPDATE UserActivity SET XP = ? WHERE MemberId = ?;", (new_xp, member_id))
         self.db.connection.commit()
-        print(f"Updated XP for Member {member_id} to {new_xp}.")
+        if cursor.rowcount:
+            self.rankings["XP"].set(member_id, new_xp)
+        self.logger.debug(f"Updated XP for Member {member_id} to {new_xp}.", extra={"member_id": member_id, "xp": new_xp})
 
     
 
@@ -151,102 +465,75 @@ class DiscordBotCrud:
                 # Return None if no data is found for the user
                 return None
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
+            self.logger.error(f"Database error: {e}")
             return None
         finally:
             cursor.close()
 
 
-    def get_top_chat_users(self, days=7):
+    def rollup_activity(self, now=None):
+        """Fold old hourly buckets into daily ones and drop buckets past retention."""
+        now = time.time() if now is None else now
+        hourly_cutoff = bucket_start(now - HOURLY_RETENTION, DAY)
+        daily_cutoff = bucket_start(now - DAILY_RETENTION, DAY)
         try:
-            cursor = self.db.connection.cursor()
-
-            # Query for the last 7 days
-            cursor.execute("""
-                SELECT MemberId, MessagesSent 
-                FROM UserActivity
-                WHERE LastMessageTime >= DATETIME('now', ?)
-                ORDER BY MessagesSent DESC
-                LIMIT 10;
-            """, (f"-{days} days",))
-            recent_data = cursor.fetchall()
-
-            if recent_data:
-                return recent_data  # Return recent data if available
-            else:
-                # Fallback to all-time data
+            with self.db.connection:
+                cursor = self.db.connection.cursor()
                 cursor.execute("""
-                    SELECT MemberId, MessagesSent 
-                    FROM UserActivity
-                    ORDER BY MessagesSent DESC
-                    LIMIT 10;
-                """)
-                all_time_data = cursor.fetchall()
-                return all_time_data
-
+                    INSERT INTO ActivityBuckets (BucketStart, BucketSize, MemberId, MessagesSent, MinutesInVC)
+                    SELECT BucketStart / ? * ?, ?, MemberId, SUM(MessagesSent), SUM(MinutesInVC)
+                    FROM ActivityBuckets
+                    WHERE BucketSize = ? AND BucketStart < ?
+                    GROUP BY BucketStart / ?, MemberId
+                    ON CONFLICT(BucketStart, BucketSize, MemberId) DO UPDATE SET
+                        MessagesSent = MessagesSent + excluded.MessagesSent,
+                        MinutesInVC = MinutesInVC + excluded.MinutesInVC;
+                """, (DAY, DAY, DAY, HOUR, hourly_cutoff, DAY))
+                cursor.execute("DELETE FROM ActivityBuckets WHERE BucketSize = ? AND BucketStart < ?;", (HOUR, hourly_cutoff))
+                cursor.execute("DELETE FROM ActivityBuckets WHERE BucketSize = ? AND BucketStart < ?;", (DAY, daily_cutoff))
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            return []
-        finally:
-            cursor.close()
+            self.logger.error(f"Database error while rolling up activity: {e}")
 
-    def get_top_voice_users(self, days=7):
+    def get_top_activity(self, column, days=7, limit=10):
+        """Top members by MessagesSent or MinutesInVC over the last `days` days (1, 7 and 30 are typical)."""
+        if column not in ("MessagesSent", "MinutesInVC"):
+            raise ValueError(f"Unknown activity column: {column}")
         try:
             cursor = self.db.connection.cursor()
-
-            # Query for the last 7 days
-            cursor.execute("""
-                SELECT MemberId, MinutesInVC 
-                FROM UserActivity
-                WHERE LastVCTimestamp >= DATETIME('now', ?)
-                ORDER BY MinutesInVC DESC
-                LIMIT 10;
-            """, (f"-{days} days",))
-            recent_data = cursor.fetchall()
-
-            if recent_data:
-                return recent_data  # Return recent data if available
-            else:
-                # Fallback to all-time data
-                cursor.execute("""
-                    SELECT MemberId, MinutesInVC 
-                    FROM UserActivity
-                    ORDER BY MinutesInVC DESC
-                    LIMIT 10;
-                """)
-                all_time_data = cursor.fetchall()
-                return all_time_data
-
+            cursor.execute(f"""
+                SELECT b.MemberId, SUM(b.{column}) AS Total
+                FROM ActivityBuckets b
+                JOIN Members m ON m.MemberId = b.MemberId
+                WHERE b.BucketStart >= ? AND m.LeftAt IS NULL
+                GROUP BY b.MemberId
+                HAVING Total > 0
+                ORDER BY Total DESC
+                LIMIT ?;
+            """, (int(time.time() - days * DAY), limit))
+            return cursor.fetchall()
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
+            self.logger.error(f"Database error: {e}")
             return []
         finally:
             cursor.close()
 
-    def get_top_xp(self):
-        try:
-            cursor = self.db.connection.cursor()
-
-            # Query for the last 7 days
-            cursor.execute("""
-                SELECT MemberId, XP 
-                FROM UserActivity
-                ORDER BY XP DESC
-                LIMIT 9;
-            """)
+    def get_top_all_time(self, column, limit=10):
+        """Top members by a lifetime UserActivity column, from the in-memory index."""
+        if column not in ("MessagesSent", "MinutesInVC"):
+            raise ValueError(f"Unknown activity column: {column}")
+        return self.rankings[column].top(limit)
 
-            # Fetch all the results
-            top_xp_data = cursor.fetchall()
-
-            # If there are top users, return them as a list of tuples (MemberId, XP)
-            return top_xp_data if top_xp_data else []
+    def get_top_chat_users(self, days=7):
+        # Messages sent in the window, falling back to all-time data if nobody was active
+        return self.get_top_activity("MessagesSent", days) or self.get_top_all_time("MessagesSent")
 
-        except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            return []
-        finally:
-            cursor.close()
+    def get_top_voice_users(self, days=7):
+        # Minutes in voice in the window, falling back to all-time data if nobody was active
+        return self.get_top_activity("MinutesInVC", days) or self.get_top_all_time("MinutesInVC")
 
+    def get_top_xp(self):
+        # Served from the in-memory index as a list of tuples (MemberId, XP)
+        return self.rankings["XP"].top(9)
 
     def add_xp(self, member_id, xp_amt):
         try:
@@ -258,9 +545,11 @@ class DiscordBotCrud:
             WHERE MemberId = ?''', (xp_amt, member_id))
 
             self.db.connection.commit()
+            if cursor.rowcount:
+                self.rankings["XP"].add(member_id, xp_amt)
         
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
+            self.logger.error(f"Database error: {e}")
             return []
         finally:
             cursor.close()
@@ -275,54 +564,123 @@ class DiscordBotCrud:
             WHERE MemberId = ?''', (xp_amt, member_id))
 
             self.db.connection.commit()
+            if cursor.rowcount:
+                self.rankings["XP"].add(member_id, -xp_amt)
         
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
+            self.logger.error(f"Database error: {e}")
             return []
         finally:
             cursor.close()
 
-    def add_cash(self, member_id, cash_amt):
-        try:
-            cursor = self.db.connection.cursor()
+    def _post(self, cursor, member_id, amount, reason, require_funds=False):
+        """Apply a signed cash amount and append it to the ledger.
+
+        Runs inside the caller's transaction. With require_funds a debit only
+        applies if the balance covers it, checked in the same UPDATE so two
+        commands can't both spend the same cash. Returns the new balance, or
+        None if nothing changed.
+        """
+        if require_funds and amount < 0:
+            cursor.execute("UPDATE Money SET Cash = Cash + ? WHERE MemberId = ? AND Cash >= ?;", (amount, member_id, -amount))
+        else:
+            cursor.execute("UPDATE Money SET Cash = Cash + ? WHERE MemberId = ?;", (amount, member_id))
+        if not cursor.rowcount:
+            return None
 
-            cursor.execute('''
-            UPDATE Money
-            SET Cash = Cash + ?
-            WHERE MemberId = ?''', (cash_amt, member_id))
+        cursor.execute("SELECT Cash FROM Money WHERE MemberId = ?;", (member_id,))
+        balance = cursor.fetchone()[0]
+        cursor.execute(
+            "INSERT INTO Transactions (MemberId, Amount, Balance, Reason) VALUES (?, ?, ?, ?);",
+            (member_id, amount, balance, reason),
+        )
+        return balance
 
-            self.db.connection.commit()
-        
+    def _ledger(self, member_id, postings):
+        """Apply (amount, reason, require_funds) postings for one member atomically.
+
+        Returns the final balance, or None (with nothing applied) if any posting failed.
+        """
+        try:
+            cursor = self.db.connection.cursor()
+            with self.db.connection:
+                balance = None
+                for amount, reason, require_funds in postings:
+                    balance = self._post(cursor, member_id, amount, reason, require_funds)
+                    if balance is None:
+                        self.db.connection.rollback()
+                        return None
+            self.rankings["Cash"].set(member_id, balance)
+            return balance
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            return []
+            self.logger.error(f"Database error: {e}")
+            return None
         finally:
             cursor.close()
 
-    def remove_cash(self, member_id, cash_amt):
+    def add_cash(self, member_id, cash_amt, reason="add_cash"):
+        """Credit cash. Returns the new balance, or None if the member has no Money row."""
+        return self._ledger(member_id, [(cash_amt, reason, False)])
+
+    def remove_cash(self, member_id, cash_amt, reason="remove_cash"):
+        """Remove cash unconditionally (admin use; the balance may go negative)."""
+        return self._ledger(member_id, [(-cash_amt, reason, False)])
+
+    def debit_cash(self, member_id, cash_amt, reason):
+        """Spend cash only if the balance covers it. Returns the new balance, or None if it doesn't."""
+        return self._ledger(member_id, [(-cash_amt, reason, True)])
+
+    def settle_bet(self, member_id, stake, payout, game):
+        """Take a stake and pay out winnings in one transaction.
+
+        Returns the new balance, or None if the member can't cover the stake.
+        """
+        postings = [(-stake, f"{game} bet", True)]
+        if payout:
+            postings.append((payout, f"{game} payout", False))
+        return self._ledger(member_id, postings)
+
+    def purchase_item(self, member_id, item_name):
+        """Charge for a shop item and add it to the inventory in one transaction.
+
+        Returns the new balance, or None if the item doesn't exist or the member can't afford it.
+        """
         try:
             cursor = self.db.connection.cursor()
+            item = self.catalog.find(item_name)
+            if not item:
+                return None
 
-            cursor.execute('''
-            UPDATE Money
-            SET Cash = Cash - ?
-            WHERE MemberId = ?''', (cash_amt, member_id))
-
-            self.db.connection.commit()
-        
+            with self.db.connection:
+                balance = self._post(cursor, member_id, -item.price, f"buy {item.name}", require_funds=True)
+                if balance is None:
+                    return None
+                cursor.execute("""
+                    INSERT INTO Inventory (MemberId, ItemId, Quantity)
+                    VALUES (?, ?, 1)
+                    ON CONFLICT(MemberId, ItemId) DO UPDATE SET Quantity = Quantity + 1;
+                """, (member_id, item.item_id))
+            self.rankings["Cash"].set(member_id, balance)
+            return balance
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            return []
+            self.logger.error(f"Database error: {e}")
+            return None
         finally:
             cursor.close()
 
     def reset_cash(self, member_id, new_cash):
         try:
             cursor = self.db.connection.cursor()
-            cursor.execute('''UPDATE Money SET Cash = ? WHERE MemberId = ?''', (new_cash, member_id))
-            self.db.connection.commit()
+            cursor.execute("SELECT Cash FROM Money WHERE MemberId = ?;", (member_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return
+            with self.db.connection:
+                self._post(cursor, member_id, new_cash - row[0], "reset_cash")
+            self.rankings["Cash"].set(member_id, new_cash)
+            return new_cash
         except sqlite3.Error as e:
-            print(f"An error occurred: {e}")
+            self.logger.error(f"An error occurred: {e}")
         finally:
                 cursor.close()
             
@@ -334,7 +692,7 @@ class DiscordBotCrud:
             result = cursor.fetchone()
             return result[0] if result else None
         except sqlite3.Error as e:
-            print(f"An error occurred: {e}")
+            self.logger.error(f"An error occurred: {e}")
         finally:
                 cursor.close()
 
@@ -343,27 +701,16 @@ class DiscordBotCrud:
             cursor = self.db.connection.cursor()
             column = 'LastDailyClaim' if claim_type == 'daily' else 'LastWeeklyClaim'
         
-            # Check if the record already exists
-            cursor.execute(f'SELECT 1 FROM Income WHERE MemberId = ?', (member_id,))
-            existing_record = cursor.fetchone()
-            
-            if existing_record:
-                # Update the existing record
-                cursor.execute(f'''
-                    UPDATE Income 
-                    SET {column} = ?
-                    WHERE MemberId = ?
-                ''', (time, member_id))
-            else:
-                # Insert a new record
-                cursor.execute(f'''
-                    INSERT INTO Income (MemberId, {column}) 
-                    VALUES (?, ?)
-                ''', (member_id, time))
-            
+            # Insert the claim time, or update it if the member already has a row
+            cursor.execute(f'''
+                INSERT INTO Income (MemberId, {column})
+                VALUES (?, ?)
+                ON CONFLICT(MemberId) DO UPDATE SET {column} = excluded.{column}
+            ''', (member_id, time))
+
             self.db.connection.commit()
         except sqlite3.Error as e:
-            print(f"An error occurred: {e}")
+            self.logger.error(f"An error occurred: {e}")
         finally:
                 cursor.close()
         
@@ -372,28 +719,8 @@ class DiscordBotCrud:
 
             
     def get_top_cash(self):
-        try:
-            cursor = self.db.connection.cursor()
-
-            # Query for the last 7 days
-            cursor.execute("""
-                SELECT MemberId, Cash 
-                FROM Money
-                ORDER BY Cash DESC
-                LIMIT 9;
-            """)
-
-            # Fetch all the results
-            top_cash_data = cursor.fetchall()
-
-            # If there are top users, return them as a list of tuples (MemberId, XP)
-            return top_cash_data if top_cash_data else []
-
-        except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            return []
-        finally:
-            cursor.close()
+        # Served from the in-memory index as a list of tuples (MemberId, Cash)
+        return self.rankings["Cash"].top(9)
 
     def get_inventory(self, member_id):
         try:
@@ -409,29 +736,18 @@ class DiscordBotCrud:
 
             return results
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
+            self.logger.error(f"Database error: {e}")
             return []
         finally:
             cursor.close()
 
     def get_shop_items(self):
+        """Return (ItemName, ItemPrice) for every shop item, from the catalog."""
+        return [(item.name, item.price) for item in self.catalog.all()]
 
-        try:
-            cursor = self.db.connection.cursor()
-
-            cursor.execute('''
-            SELECT ItemName, ItemPrice
-            FROM Shop''')
-            
-            results = cursor.fetchall()
-
-            return results
-
-        except sqlite3.Error as e:
-            print(f"Database error: {e}")
-            return []
-        finally:
-            cursor.close()
+    def get_shop_item(self, item_name):
+        """Return the full ShopItem for a name in any case, or None. Served from the catalog."""
+        return self.catalog.find(item_name)
 
     def add_shop_item(self, name, price, consumable, role_assigned=None):
         try:
@@ -441,8 +757,9 @@ class DiscordBotCrud:
                 VALUES (?, ?, ?, ?)
             ''', (name, price, consumable, role_assigned))
             self.db.connection.commit()
+            self.load_catalog()
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
+            self.logger.error(f"Database error: {e}")
             return []
         finally:
             cursor.close()
@@ -452,35 +769,35 @@ class DiscordBotCrud:
         try:
             cursor = self.db.connection.cursor()
 
-            # Ensure the item exists first (check for exact match)
-            cursor.execute('''SELECT ItemName, ItemId FROM Shop WHERE LOWER(ItemName) = LOWER(?)''', (item_name,))
-            item = cursor.fetchone()
+            # Ensure the item exists first (names match in any case)
+            item = self.catalog.find(item_name)
 
             if not item:
                 # If no matching item is found, return False
-                print(f"Item '{item_name}' not found in the shop.")
+                self.logger.info(f"Item '{item_name}' not found in the shop.", extra={"item": item_name})
                 return False  # Item not found, return False
 
-            item_id = item[1]  # Get the ItemId of the item to be deleted
+            item_id = item.item_id  # Get the ItemId of the item to be deleted
 
             # Delete the related entries in the Inventory table
             cursor.execute('''DELETE FROM Inventory WHERE ItemId = ?''', (item_id,))
 
             # Proceed with deleting the item from the Shop table
-            cursor.execute('''DELETE FROM Shop WHERE LOWER(ItemName) = LOWER(?)''', (item_name,))
+            cursor.execute('''DELETE FROM Shop WHERE ItemId = ?''', (item_id,))
             self.db.connection.commit()
+            self.load_catalog()
 
             # Check if the deletion was successful
             rows_affected = cursor.rowcount
             if rows_affected > 0:
-                print(f"Item '{item_name}' successfully deleted from the shop.")
+                self.logger.info(f"Item '{item_name}' successfully deleted from the shop.", extra={"item": item_name})
                 return True  # Successful deletion
             else:
-                print(f"Item '{item_name}' could not be deleted (no rows affected).")
+                self.logger.warning(f"Item '{item_name}' could not be deleted (no rows affected).", extra={"item": item_name})
                 return False  # No rows affected, deletion failed
 
         except sqlite3.Error as e:
-            print(f"Database error: {e}")
+            self.logger.error(f"Database error: {e}")
             return False  # Return False on error
         finally:
             cursor.close()
@@ -491,39 +808,23 @@ class DiscordBotCrud:
         try:
             cursor = self.db.connection.cursor()
 
-    # Get the item ID from the Shop table
-            cursor.execute('''
-            SELECT ItemId
-            FROM Shop
-            WHERE ItemName = ?''', (item_name,))
-            result = cursor.fetchone()
-            if not result:
+            # Get the item ID from the catalog
+            item = self.catalog.find(item_name)
+            if not item:
                 # If the item doesn't exist in the shop, do nothing
                 return
 
-            item_id = result[0]
+            item_id = item.item_id
 
-            # Check if the member already has the item in their inventory
+            # Add the item, or bump the quantity if the member already has it
             cursor.execute('''
-            SELECT COUNT(*)
-            FROM Inventory
-            WHERE MemberId = ? AND ItemId = ?''', (member_id, item_id))
-            result = cursor.fetchone()
-            if result and result[0] > 0:
-                # If the member already has the item, increase the quantity by 1
-                cursor.execute('''
-                UPDATE Inventory
-                SET Quantity = Quantity + 1
-                WHERE MemberId = ? AND ItemId = ?''', (member_id, item_id))
-            else:
-                # Otherwise, add a new row to the Inventory table with quantity 1
-                cursor.execute('''
-                INSERT INTO Inventory (MemberId, ItemId, Quantity)
-                VALUES (?, ?, 1)''', (member_id, item_id))
+            INSERT INTO Inventory (MemberId, ItemId, Quantity)
+            VALUES (?, ?, 1)
+            ON CONFLICT(MemberId, ItemId) DO UPDATE SET Quantity = Quantity + 1''', (member_id, item_id))
 
             self.db.connection.commit()
         except sqlite3.Error as e:
-                print(f"Database error: {e}")
+                self.logger.error(f"Database error: {e}")
                 return []
         finally:
             cursor.close()
@@ -533,16 +834,12 @@ class DiscordBotCrud:
         try:
             cursor = self.db.connection.cursor()
 
-            # Get the item ID and effects from the Shop table
-            cursor.execute('''
-            SELECT ItemId, ItemConsumable, RoleAssigned
-            FROM Shop
-            WHERE ItemName = ?''', (item_name,))
-            result = cursor.fetchone()
-            if not result:
+            # Get the item ID and effects from the catalog
+            item = self.catalog.find(item_name)
+            if not item:
                 raise ValueError("Item not found in shop.")
-            
-            item_id, consumable, role_assigned = result
+
+            item_id, consumable, role_assigned = item.item_id, item.consumable, item.role
 
             # Check if the user has the item in their inventory
             cursor.execute('''
@@ -594,7 +891,7 @@ class DiscordBotCrud:
                 return 0  # If no result, return 0 (user not found or no cash set)
 
         except sqlite3.Error as e:
-            print(f"Error while fetching cash balance: {e}")
+            self.logger.error(f"Error while fetching cash balance: {e}")
             return 0  # Return 0 in case of an error
 
         finally:
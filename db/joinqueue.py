@@ -0,0 +1,41 @@
+class JoinQueue:
+    """Batch new members so a join flood costs one write per flush, not one per member.
+
+    Joins are held in memory until the next flush (or until ``max_pending``
+    are waiting) and written with ``add_members``. A member who leaves before
+    the flush is simply dropped from the queue.
+    """
+
+    def __init__(self, db, flush_interval=2.0, max_pending=200):
+        self.db = db
+        self.flush_interval = flush_interval  # Seconds between timed flushes
+        self.max_pending = max_pending        # Joins that force an early flush
+
+        self.pending = {}  # MemberId -> name
+
+    def add(self, member_id, name=None):
+        """Queue a join. Returns True when a flush is due."""
+        self.pending[member_id] = name
+        return len(self.pending) >= self.max_pending
+
+    def discard(self, member_id):
+        """Drop a queued join. Returns True if the member was still queued."""
+        if member_id in self.pending:
+            del self.pending[member_id]
+            return True
+        return False
+
+    async def flush(self):
+        """Write every queued join in one batch. Returns the number of members written."""
+        if not self.pending:
+            return 0
+
+        rows = list(self.pending.items())
+        self.pending = {}
+
+        if not await self.db.add_members(rows):
+            # Keep them queued so the next flush retries, without losing newer joins
+            for member_id, name in rows:
+                self.pending.setdefault(member_id, name)
+            return 0
+        return len(rows)
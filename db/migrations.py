@@ -0,0 +1,335 @@
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+# Each migration is (version, description, function). Functions receive a cursor
+# inside an open transaction and must not commit. Append new migrations to the
+# end of MIGRATIONS; never edit one that has already shipped.
+
+
+def _columns(cursor, table):
+    """Return the column names of a table, or an empty list if it doesn't exist."""
+    cursor.execute(f"PRAGMA table_info({table});")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def create_base_tables(cursor):
+    """The tables as they existed before versioning (all created IF NOT EXISTS)."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Members (
+            MemberId INTEGER PRIMARY KEY
+        );
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS UserActivity (
+            MemberId INTEGER PRIMARY KEY,
+            MessagesSent INTEGER DEFAULT 0,
+            XP INTEGER DEFAULT 0,
+            LastMessageTime DATETIME DEFAULT CURRENT_TIMESTAMP,
+            LastVCTimestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            MinutesInVC INTEGER DEFAULT 0
+        );
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Money (
+            MemberId INTEGER,
+            Cash INTEGER DEFAULT 0,
+            FOREIGN KEY (MemberId) REFERENCES Members(MemberId)
+        );
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Income (
+            MemberId INTEGER,
+            Cash INTEGER DEFAULT 0,
+            LastDailyClaim TEXT,
+            LastWeeklyClaim TEXT,
+            FOREIGN KEY (MemberId) REFERENCES Members(MemberId)
+        );
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Shop (
+            ItemId INTEGER PRIMARY KEY,
+            ItemName TEXT,
+            ItemPrice INTEGER,
+            ItemConsumable BOOLEAN,
+            RoleAssigned INTEGER
+        );
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Inventory (
+            MemberId INTEGER,
+            ItemId INTEGER,
+            Quantity INTEGER DEFAULT 1,
+            FOREIGN KEY (MemberId) REFERENCES Members(MemberId),
+            FOREIGN KEY (ItemId) REFERENCES Shop(ItemId)
+        );
+    ''')
+
+
+def add_keys_and_indexes(cursor):
+    """Rebuild Money, Income, Inventory and UserActivity with keys, merging duplicate rows.
+
+    Duplicates come from add_member running more than once for the same member.
+    Every UPDATE matched all copies, so they hold the same values and MAX()
+    keeps that value rather than multiplying it.
+    """
+    # Rows whose member is missing from Members would break the foreign keys
+    for table in ("UserActivity", "Money", "Income", "Inventory"):
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO Members (MemberId)
+            SELECT DISTINCT MemberId FROM {table} WHERE MemberId IS NOT NULL;
+        ''')
+
+    cursor.execute('''
+        CREATE TABLE Money_new (
+            MemberId INTEGER PRIMARY KEY,
+            Cash INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (MemberId) REFERENCES Members(MemberId)
+        );
+    ''')
+    cursor.execute('''
+        INSERT INTO Money_new (MemberId, Cash)
+        SELECT MemberId, COALESCE(MAX(Cash), 0) FROM Money
+        WHERE MemberId IS NOT NULL GROUP BY MemberId;
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE Income_new (
+            MemberId INTEGER PRIMARY KEY,
+            Cash INTEGER NOT NULL DEFAULT 0,
+            LastDailyClaim TEXT,
+            LastWeeklyClaim TEXT,
+            FOREIGN KEY (MemberId) REFERENCES Members(MemberId)
+        );
+    ''')
+    cursor.execute('''
+        INSERT INTO Income_new (MemberId, Cash, LastDailyClaim, LastWeeklyClaim)
+        SELECT MemberId, COALESCE(MAX(Cash), 0), MAX(LastDailyClaim), MAX(LastWeeklyClaim) FROM Income
+        WHERE MemberId IS NOT NULL GROUP BY MemberId;
+    ''')
+
+    # add_member used to insert a placeholder row with no ItemId for every member;
+    # those and rows for items no longer in the shop never showed up in +inv.
+    cursor.execute('''
+        CREATE TABLE Inventory_new (
+            MemberId INTEGER NOT NULL,
+            ItemId INTEGER NOT NULL,
+            Quantity INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (MemberId, ItemId),
+            FOREIGN KEY (MemberId) REFERENCES Members(MemberId),
+            FOREIGN KEY (ItemId) REFERENCES Shop(ItemId)
+        );
+    ''')
+    cursor.execute('''
+        INSERT INTO Inventory_new (MemberId, ItemId, Quantity)
+        SELECT i.MemberId, i.ItemId, MAX(i.Quantity) FROM Inventory i
+        JOIN Shop s ON s.ItemId = i.ItemId
+        WHERE i.MemberId IS NOT NULL AND i.Quantity > 0
+        GROUP BY i.MemberId, i.ItemId;
+    ''')
+
+    # Older databases may have the UserActivity shape from database.py, without timestamps
+    existing = _columns(cursor, "UserActivity")
+    last_message = "MAX(LastMessageTime)" if "LastMessageTime" in existing else "NULL"
+    last_vc = "MAX(LastVCTimestamp)" if "LastVCTimestamp" in existing else "NULL"
+    cursor.execute('''
+        CREATE TABLE UserActivity_new (
+            MemberId INTEGER PRIMARY KEY,
+            MessagesSent INTEGER NOT NULL DEFAULT 0,
+            XP INTEGER NOT NULL DEFAULT 0,
+            LastMessageTime DATETIME DEFAULT CURRENT_TIMESTAMP,
+            LastVCTimestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            MinutesInVC INTEGER NOT NULL DEFAULT 0
+        );
+    ''')
+    cursor.execute(f'''
+        INSERT INTO UserActivity_new (MemberId, MessagesSent, XP, LastMessageTime, LastVCTimestamp, MinutesInVC)
+        SELECT MemberId, COALESCE(MAX(MessagesSent), 0), COALESCE(MAX(XP), 0),
+               {last_message}, {last_vc}, COALESCE(MAX(MinutesInVC), 0)
+        FROM UserActivity WHERE MemberId IS NOT NULL GROUP BY MemberId;
+    ''')
+
+    for table in ("Money", "Income", "Inventory", "UserActivity"):
+        cursor.execute(f"DROP TABLE {table};")
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table};")
+
+    # Leaderboards sort by these columns
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_useractivity_xp ON UserActivity (XP DESC);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_useractivity_messages ON UserActivity (MessagesSent DESC);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_useractivity_voice ON UserActivity (MinutesInVC DESC);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_money_cash ON Money (Cash DESC);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inventory_item ON Inventory (ItemId);")
+
+
+def create_activity_buckets(cursor):
+    """Per-member activity in time buckets, so leaderboards can cover a real rolling window.
+
+    BucketStart is a unix timestamp aligned to BucketSize (3600 for hourly,
+    86400 for daily). Hourly buckets are rolled up into daily ones and old daily
+    buckets are dropped by DiscordBotCrud.rollup_activity.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ActivityBuckets (
+            BucketStart INTEGER NOT NULL,
+            BucketSize INTEGER NOT NULL,
+            MemberId INTEGER NOT NULL,
+            MessagesSent INTEGER NOT NULL DEFAULT 0,
+            MinutesInVC REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (BucketStart, BucketSize, MemberId)
+        ) WITHOUT ROWID;
+    ''')
+
+
+def add_member_names(cursor):
+    """Remember member names so leaderboards can render without asking Discord."""
+    if "Name" not in _columns(cursor, "Members"):
+        cursor.execute("ALTER TABLE Members ADD COLUMN Name TEXT;")
+
+
+def create_voice_sessions(cursor):
+    """Open voice sessions, so time in voice survives a restart.
+
+    Times are unix timestamps. CreditedUntil is how far the session has been
+    credited to UserActivity; LastSeen is the last time the bot confirmed the
+    member was still in voice.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS VoiceSessions (
+            MemberId INTEGER PRIMARY KEY,
+            ChannelId INTEGER,
+            StartedAt REAL NOT NULL,
+            CreditedUntil REAL NOT NULL,
+            LastSeen REAL NOT NULL
+        );
+    ''')
+
+
+def create_transactions(cursor):
+    """Append-only cash ledger. Amount is signed; Balance is the balance after it."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Transactions (
+            TransactionId INTEGER PRIMARY KEY AUTOINCREMENT,
+            MemberId INTEGER NOT NULL,
+            Amount INTEGER NOT NULL,
+            Balance INTEGER NOT NULL,
+            Reason TEXT,
+            CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_member ON Transactions (MemberId, TransactionId);")
+
+
+def add_member_departures(cursor):
+    """Mark members who left instead of deleting them, so a partial member list can't erase data."""
+    if "LeftAt" not in _columns(cursor, "Members"):
+        cursor.execute("ALTER TABLE Members ADD COLUMN LeftAt DATETIME;")
+
+
+def make_voice_minutes_real(cursor):
+    """Store UserActivity.MinutesInVC as REAL, so partial minutes from voice ticks add up.
+
+    Databases whose column is already REAL are left alone.
+    """
+    cursor.execute("PRAGMA table_info(UserActivity);")
+    if any(row[1] == "MinutesInVC" and row[2].upper() == "REAL" for row in cursor.fetchall()):
+        return
+
+    cursor.execute('''
+        CREATE TABLE UserActivity_new (
+            MemberId INTEGER PRIMARY KEY,
+            MessagesSent INTEGER NOT NULL DEFAULT 0,
+            XP INTEGER NOT NULL DEFAULT 0,
+            LastMessageTime DATETIME DEFAULT CURRENT_TIMESTAMP,
+            LastVCTimestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            MinutesInVC REAL NOT NULL DEFAULT 0
+        );
+    ''')
+    cursor.execute('''
+        INSERT INTO UserActivity_new (MemberId, MessagesSent, XP, LastMessageTime, LastVCTimestamp, MinutesInVC)
+        SELECT MemberId, MessagesSent, XP, LastMessageTime, LastVCTimestamp, MinutesInVC FROM UserActivity;
+    ''')
+    cursor.execute("DROP TABLE UserActivity;")
+    cursor.execute("ALTER TABLE UserActivity_new RENAME TO UserActivity;")
+
+    # Dropped with the old table
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_useractivity_xp ON UserActivity (XP DESC);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_useractivity_messages ON UserActivity (MessagesSent DESC);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_useractivity_voice ON UserActivity (MinutesInVC DESC);")
+
+
+def drop_voice_last_seen(cursor):
+    """Rebuild VoiceSessions without LastSeen, which was always written together with CreditedUntil."""
+    cursor.execute('''
+        CREATE TABLE VoiceSessions_new (
+            MemberId INTEGER PRIMARY KEY,
+            ChannelId INTEGER,
+            StartedAt REAL NOT NULL,
+            CreditedUntil REAL NOT NULL
+        );
+    ''')
+    cursor.execute('''
+        INSERT INTO VoiceSessions_new (MemberId, ChannelId, StartedAt, CreditedUntil)
+        SELECT MemberId, ChannelId, StartedAt, CreditedUntil FROM VoiceSessions;
+    ''')
+    cursor.execute("DROP TABLE VoiceSessions;")
+    cursor.execute("ALTER TABLE VoiceSessions_new RENAME TO VoiceSessions;")
+
+
+MIGRATIONS = [
+    (1, "base tables", create_base_tables),
+    (2, "keys, dedupe and leaderboard indexes", add_keys_and_indexes),
+    (3, "activity buckets", create_activity_buckets),
+    (4, "member names", add_member_names),
+    (5, "voice sessions", create_voice_sessions),
+    (6, "cash ledger", create_transactions),
+    (7, "member departures", add_member_departures),
+    (8, "fractional voice minutes", make_voice_minutes_real),
+    (9, "voice sessions without LastSeen", drop_voice_last_seen),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(connection):
+    """Return the schema version recorded in the database (0 if never migrated)."""
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS SchemaVersion (
+            Version INTEGER PRIMARY KEY,
+            Description TEXT,
+            AppliedAt DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    row = connection.execute("SELECT MAX(Version) FROM SchemaVersion;").fetchone()
+    return row[0] or 0
+
+
+def migrate(connection):
+    """Apply every pending migration, each in its own transaction. Returns the new version."""
+    version = get_version(connection)
+    if version >= LATEST_VERSION:
+        return version
+
+    for number, description, apply in MIGRATIONS:
+        if number <= version:
+            continue
+
+        start = time.perf_counter()
+        cursor = connection.cursor()
+        try:
+            cursor.execute("BEGIN;")
+            apply(cursor)
+            cursor.execute("INSERT INTO SchemaVersion (Version, Description) VALUES (?, ?);", (number, description))
+            connection.commit()
+        except sqlite3.Error as e:
+            connection.rollback()
+            logger.error(f"Migration {number} ({description}) failed: {e}")
+            raise
+        finally:
+            cursor.close()
+
+        version = number
+        logger.info(f"Applied migration {number} ({description}) in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    return version
@@ -0,0 +1,108 @@
+import bisect
+import itertools
+
+# Entries per bucket. A bucket is split in two once it grows past twice this.
+BUCKET_SIZE = 512
+
+
+class ScoreIndex:
+    """Members ordered by score, kept sorted as scores change.
+
+    Entries are (-score, member_id), so the highest score comes first and ties
+    break on MemberId. They are kept in a list of sorted buckets with each
+    bucket's last entry in ``maxes``: an update is a binary search over the
+    bucket maxima plus an insert or delete inside one bucket of at most
+    2 * BUCKET_SIZE entries, so its cost barely grows with the member count.
+    Top-N walks only the first buckets; rank adds up the sizes of the buckets
+    before the member's, which is one pass over a short list.
+    """
+
+    def __init__(self):
+        self.scores = {}  # MemberId -> score
+        self.buckets = []
+        self.maxes = []
+
+    def __len__(self):
+        return len(self.scores)
+
+    def _build(self, entries):
+        """Replace the buckets with already sorted entries."""
+        self.buckets = [entries[start:start + BUCKET_SIZE] for start in range(0, len(entries), BUCKET_SIZE)]
+        self.maxes = [bucket[-1] for bucket in self.buckets]
+
+    def _insert(self, entry):
+        if not self.buckets:
+            self.buckets.append([entry])
+            self.maxes.append(entry)
+            return
+        i = min(bisect.bisect_left(self.maxes, entry), len(self.maxes) - 1)
+        bucket = self.buckets[i]
+        bisect.insort(bucket, entry)
+        self.maxes[i] = bucket[-1]
+        if len(bucket) > 2 * BUCKET_SIZE:
+            self.buckets[i:i + 1] = [bucket[:BUCKET_SIZE], bucket[BUCKET_SIZE:]]
+            self.maxes[i:i + 1] = [bucket[BUCKET_SIZE - 1], bucket[-1]]
+
+    def _remove(self, entry):
+        i = bisect.bisect_left(self.maxes, entry)
+        bucket = self.buckets[i]
+        del bucket[bisect.bisect_left(bucket, entry)]
+        if bucket:
+            self.maxes[i] = bucket[-1]
+        else:
+            del self.buckets[i]
+            del self.maxes[i]
+
+    def load(self, rows):
+        """Replace the index with (MemberId, score) rows."""
+        self.scores = {member_id: score or 0 for member_id, score in rows}
+        self._build(sorted((-score, member_id) for member_id, score in self.scores.items()))
+
+    def set(self, member_id, score):
+        """Set a member's absolute score."""
+        score = score or 0
+        old = self.scores.get(member_id)
+        if old is not None:
+            if old == score:
+                return
+            self._remove((-old, member_id))
+        self.scores[member_id] = score
+        self._insert((-score, member_id))
+
+    def add(self, member_id, delta):
+        """Apply a delta to a member's score (members not yet indexed start at 0)."""
+        self.set(member_id, self.scores.get(member_id, 0) + delta)
+
+    def ensure(self, member_ids):
+        """Index members who aren't indexed yet at a score of 0, re-sorting once for the batch."""
+        new = [member_id for member_id in dict.fromkeys(member_ids) if member_id not in self.scores]
+        if len(new) < 64:
+            for member_id in new:
+                self.set(member_id, 0)
+            return
+        for member_id in new:
+            self.scores[member_id] = 0
+        entries = list(itertools.chain.from_iterable(self.buckets))
+        entries.extend((0, member_id) for member_id in new)
+        entries.sort()
+        self._build(entries)
+
+    def discard(self, member_id):
+        """Remove a member from the index if present."""
+        old = self.scores.pop(member_id, None)
+        if old is not None:
+            self._remove((-old, member_id))
+
+    def top(self, n):
+        """Return the top n members as (MemberId, score)."""
+        entries = itertools.islice(itertools.chain.from_iterable(self.buckets), n)
+        return [(member_id, -score) for score, member_id in entries]
+
+    def rank(self, member_id):
+        """Return a member's 1-based rank, or None if they aren't indexed."""
+        score = self.scores.get(member_id)
+        if score is None:
+            return None
+        entry = (-score, member_id)
+        i = bisect.bisect_left(self.maxes, entry)
+        return sum(map(len, self.buckets[:i])) + bisect.bisect_left(self.buckets[i], entry) + 1
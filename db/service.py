@@ -0,0 +1,96 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from db.balancecache import BalanceCache
+from db.dbcalls import DiscordBotCrud
+from db.writer import RemoteCrud
+
+# Ledger methods: each returns the member's new balance, or None if nothing changed
+BALANCE_WRITES = {"add_cash", "remove_cash", "debit_cash", "settle_bet", "purchase_item", "reset_cash"}
+# Methods that change Money without reporting the balance
+BALANCE_RESETS = {"add_member", "remove_member"}
+
+
+class DatabaseService:
+    """Process-wide database access shared by the bot and every cog.
+
+    There is one sqlite connection, owned by a single worker thread. Every
+    ``DiscordBotCrud`` method is exposed as a coroutine, so cogs call
+    ``await self.db.get_cash(member_id)`` and the event loop never blocks on
+    sqlite. Because the worker runs one call at a time, writes are serialized
+    through that connection.
+
+    Cash balances are served from ``balances`` when cached. Ledger writes go
+    through the worker as usual and refresh the cache with the balance they
+    return; results come back in the order the worker ran them, so the cache
+    always ends on the latest value.
+
+    With ``writer`` set to a db.writer address, calls are forwarded to that
+    process instead, so several shard-group processes share one connection.
+    Another process may then change a balance, so balances aren't cached.
+    """
+
+    def __init__(self, db_name="discord_bot.db", pragmas=None, perf=None, writer=None):
+        self.db_name = db_name
+        self.pragmas = pragmas
+        self.writer = writer
+        self.perf = perf  # utils.perf.Perf; each CRUD call's time on the worker is recorded as a query
+        self.crud = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self.balances = BalanceCache(maxsize=0 if writer else 4096)
+
+    async def start(self):
+        """Open the connection on the worker thread."""
+        if self.crud is None and self.writer:
+            self.crud = await self.run(RemoteCrud, self.writer)
+        elif self.crud is None:
+            self.crud = await self.run(DiscordBotCrud, self.db_name, self.pragmas)
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the database thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def get_cash(self, member_id):
+        """Return a member's cash, from memory when possible."""
+        cash = self.balances.get(member_id)
+        if cash is None:
+            cash = await self._call("get_cash", member_id)
+            self.balances.put(member_id, cash)
+        return cash
+
+    async def _call(self, name, *args, **kwargs):
+        if self.crud is None:
+            raise RuntimeError("DatabaseService.start() has not been awaited.")
+        func = getattr(self.crud, name)
+        if self.perf is not None:
+            func = self.perf.timed("query", name, func)
+        return await self.run(func, *args, **kwargs)
+
+    async def close(self):
+        """Close the connection and stop the worker thread."""
+        if self.crud is not None:
+            await self.run(self.crud.close)
+            self.crud = None
+        self.executor.shutdown(wait=True)
+
+    def __getattr__(self, name):
+        # Only reached for names not defined above: wrap the CRUD method of the same name
+        method = getattr(DiscordBotCrud, name, None)
+        if method is None or not callable(method):
+            raise AttributeError(f"{type(self).__name__} has no attribute {name!r}")
+
+        async def call(*args, **kwargs):
+            result = await self._call(name, *args, **kwargs)
+            if name in BALANCE_WRITES or name in BALANCE_RESETS:
+                member_id = args[0] if args else kwargs["member_id"]
+                if name in BALANCE_WRITES and result is not None:
+                    self.balances.put(member_id, result)
+                else:
+                    self.balances.invalidate(member_id)
+            return result
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        setattr(self, name, call)
+        return call
@@ -0,0 +1,151 @@
+"""A database writer process shared by several bot processes.
+
+When shard groups run as separate processes, none of them can own the sqlite
+connection: the in-memory leaderboards would drift and every process would
+contend for the write lock. Instead one writer process owns DiscordBotCrud
+and the bots send it method calls over a local socket (``DB_WRITER``, see
+``DatabaseService``). Calls from every bot run one at a time on a single
+database thread, exactly as they do in a single-process bot. Start it with:
+
+    DB_WRITER_KEY=secret python -m db.writer --address 127.0.0.1:7433
+
+``DB_WRITER_KEY`` authenticates clients; requests are pickled, so the writer
+should only ever listen on a local address.
+"""
+import argparse
+import logging
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
+
+from db.database import parse_pragmas
+from db.dbcalls import DiscordBotCrud
+from utils.logs import parse_settings, setup_logging
+
+logger = logging.getLogger("db.writer")  # Also when run as __main__
+
+# Only the writer itself may close the shared connection
+LOCAL_ONLY = {"close"}
+
+
+def parse_address(text):
+    """"127.0.0.1:7433" -> ("127.0.0.1", 7433)"""
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def writer_key():
+    key = os.getenv("DB_WRITER_KEY")
+    if not key:
+        raise RuntimeError("DB_WRITER_KEY must be set to use a database writer process.")
+    return key.encode()
+
+
+class RemoteCrud:
+    """Blocking stand-in for DiscordBotCrud that forwards each call to the writer.
+
+    Used by DatabaseService on its worker thread, so one connection carries one
+    call at a time.
+    """
+
+    def __init__(self, address, key=None):
+        self.connection = Client(parse_address(address), authkey=key or writer_key())
+
+    def _request(self, name, args, kwargs):
+        self.connection.send((name, args, kwargs))
+        ok, result = self.connection.recv()
+        if not ok:
+            raise result
+        return result
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not callable(getattr(DiscordBotCrud, name, None)):
+            raise AttributeError(f"{type(self).__name__} has no attribute {name!r}")
+
+        def call(*args, **kwargs):
+            return self._request(name, args, kwargs)
+        call.__name__ = name
+        return call
+
+    def close(self):
+        self.connection.close()
+
+
+class Writer:
+    def __init__(self, db_name, pragmas=None):
+        # Every call runs on this one thread, which owns the sqlite connection
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self.crud = self.executor.submit(DiscordBotCrud, db_name, pragmas).result()
+        self.clients = 0
+
+    def execute(self, name, args, kwargs):
+        if name.startswith("_") or name in LOCAL_ONLY or not callable(getattr(DiscordBotCrud, name, None)):
+            raise AttributeError(f"DiscordBotCrud has no method {name!r}")
+        return self.executor.submit(getattr(self.crud, name), *args, **kwargs).result()
+
+    def serve_client(self, connection):
+        self.clients += 1
+        logger.info(f"Bot process connected ({self.clients} connected)")
+        try:
+            while True:
+                name, args, kwargs = connection.recv()
+                try:
+                    reply = (True, self.execute(name, args, kwargs))
+                except Exception as e:
+                    reply = (False, e)
+                try:
+                    connection.send(reply)
+                except Exception as e:
+                    # The result or exception couldn't be pickled
+                    connection.send((False, RuntimeError(f"{name} failed: {e!r}")))
+        except (EOFError, ConnectionError):
+            pass
+        finally:
+            connection.close()
+            self.clients -= 1
+            logger.info(f"Bot process disconnected ({self.clients} connected)")
+
+    def serve(self, address, key):
+        with Listener(parse_address(address), authkey=key) as listener:
+            logger.info(f"Database writer listening on {address}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except Exception as e:
+                    # Failed authentication or a client that hung up mid-handshake
+                    logger.warning(f"Rejected connection: {e}")
+                    continue
+                threading.Thread(target=self.serve_client, args=(connection,), daemon=True).start()
+
+    def close(self):
+        self.executor.submit(self.crud.close).result()
+        self.executor.shutdown(wait=True)
+
+
+def stop(signum, frame):
+    raise KeyboardInterrupt  # Close the database cleanly on SIGTERM too
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--address", default=os.getenv("DB_WRITER", "127.0.0.1:7433"))
+    parser.add_argument("--db", default="discord_bot.db", help="Database file")
+    args = parser.parse_args()
+
+    listener = setup_logging(os.getenv("LOG_FILE", "logs/db_writer.log"), os.getenv("LOG_LEVEL", "INFO").upper(),
+                             parse_settings(os.getenv("LOG_LEVELS", "")), parse_settings(os.getenv("LOG_SAMPLE", "")))
+    writer = Writer(args.db, parse_pragmas(os.getenv("SQLITE_PRAGMAS", "")))
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        writer.serve(args.address, writer_key())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import random
+
+# Blackjack rules, independent of Discord so they can be simulated and reused.
+
+SUITS = ['♢', '♧', '♡', '♤']
+VALUES = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+CARD_VALUES = {
+    '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10,
+    'J': 10, 'Q': 10, 'K': 10, 'A': 11
+}
+DEALER_STANDS_ON = 17
+
+# Game states
+PLAYING = "playing"
+FINISHED = "finished"
+
+# Outcomes and what each pays back, as a multiple of the bet
+PAYOUTS = {"win": 2, "dealer_bust": 2, "push": 1, "lose": 0, "bust": 0}
+
+
+def hand_value(hand):
+    """Best value of a hand, counting aces as 1 where 11 would bust."""
+    value = sum(CARD_VALUES[card[:-1]] for card in hand)
+    aces = sum(1 for card in hand if card[:-1] == 'A')
+    while value > 21 and aces:
+        value -= 10
+        aces -= 1
+    return value
+
+
+class Shoe:
+    """Several shuffled decks dealt without replacement.
+
+    The shoe is reshuffled once the cut card is reached, ``penetration`` of
+    the way through, so counts reset the way they would at a real table.
+    """
+
+    def __init__(self, decks=6, penetration=0.75, rng=None):
+        self.decks = decks
+        self.penetration = penetration
+        self.rng = rng or random.Random()
+        self.cards = []
+        self.shuffle()
+
+    def shuffle(self):
+        self.cards = [f'{value}{suit}' for _ in range(self.decks) for suit in SUITS for value in VALUES]
+        self.rng.shuffle(self.cards)
+        # Cards left in the shoe when it is due for a reshuffle
+        self.cut = int(len(self.cards) * (1 - self.penetration))
+
+    def draw(self):
+        if len(self.cards) <= self.cut:
+            self.shuffle()
+        return self.cards.pop()
+
+
+class BlackjackGame:
+    """One hand of blackjack: the player hits or stands, then the dealer draws to 17."""
+
+    def __init__(self, player_id, bet, shoe):
+        self.player_id = player_id
+        self.bet = bet
+        self.shoe = shoe
+        self.player = [shoe.draw(), shoe.draw()]
+        self.dealer = [shoe.draw(), shoe.draw()]
+        self.state = PLAYING
+        self.outcome = None
+        if hand_value(self.player) >= 21:
+            self.stand()
+
+    @property
+    def player_value(self):
+        return hand_value(self.player)
+
+    @property
+    def dealer_value(self):
+        return hand_value(self.dealer)
+
+    @property
+    def payout(self):
+        """Cash returned to the player once finished (the bet was already taken)."""
+        return PAYOUTS[self.outcome] * self.bet if self.outcome else 0
+
+    def hit(self):
+        if self.state != PLAYING:
+            return
+        self.player.append(self.shoe.draw())
+        value = self.player_value
+        if value > 21:
+            self._finish("bust")
+        elif value == 21:
+            self.stand()
+
+    def stand(self):
+        if self.state != PLAYING:
+            return
+        while self.dealer_value < DEALER_STANDS_ON:
+            self.dealer.append(self.shoe.draw())
+
+        player, dealer = self.player_value, self.dealer_value
+        if dealer > 21:
+            self._finish("dealer_bust")
+        elif dealer > player:
+            self._finish("lose")
+        elif dealer < player:
+            self._finish("win")
+        else:
+            self._finish("push")
+
+    def _finish(self, outcome):
+        self.state = FINISHED
+        self.outcome = outcome
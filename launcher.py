@@ -0,0 +1,108 @@
+"""Run the bot as several shard-group processes sharing one database writer.
+
+Starts ``db.writer`` on the database, then one ``bot.py`` process per shard
+group with SHARD_COUNT, SHARD_IDS and DB_WRITER set. Every other setting comes
+from the environment / .env as usual; when METRICS_PORT is set, group n serves
+metrics on METRICS_PORT + n. Logs go to one file per process under logs/.
+
+    python launcher.py --shards 4 --processes 2
+
+A single process with all shards only needs SHARD_COUNT=auto (or a number)
+and ``python bot.py``; the launcher is for spreading shards across cores.
+"""
+import argparse
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import time
+
+from db.writer import RemoteCrud
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def shard_groups(shards, processes):
+    """Split shard IDs into contiguous groups, e.g. 5 shards over 2 processes -> [0, 1, 2], [3, 4]."""
+    size, extra = divmod(shards, processes)
+    groups, start = [], 0
+    for index in range(processes):
+        end = start + size + (index < extra)
+        groups.append(list(range(start, end)))
+        start = end
+    return [group for group in groups if group]
+
+
+def start_writer(address, db_name, env):
+    return subprocess.Popen([sys.executable, "-m", "db.writer", "--address", address, "--db", db_name],
+                            cwd=ROOT, env=env)
+
+
+def wait_for_writer(address, key, process, timeout=30):
+    """Block until the writer accepts connections."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            RemoteCrud(address, key).close()
+            return
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f"Database writer exited with code {process.returncode}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Database writer did not start listening on {address}")
+            time.sleep(0.1)
+
+
+def group_env(base, shards, group, index, address):
+    env = dict(base, SHARD_COUNT=str(shards), SHARD_IDS=",".join(map(str, group)), DB_WRITER=address)
+    env.setdefault("LOG_FILE", "logs/eli_bot.log")
+    env["LOG_FILE"] = env["LOG_FILE"].replace(".log", f".group{index}.log")
+    if env.get("METRICS_PORT"):
+        env["METRICS_PORT"] = str(int(env["METRICS_PORT"]) + index)
+    return env
+
+
+def stop(processes):
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, required=True, help="Total number of shards")
+    parser.add_argument("--processes", type=int, default=2, help="Shard-group processes to spread them over")
+    parser.add_argument("--address", default="127.0.0.1:7433", help="Where the database writer listens")
+    parser.add_argument("--db", default="discord_bot.db", help="Database file")
+    args = parser.parse_args()
+
+    # A fresh key per launch, handed to the writer and the bots only
+    env = dict(os.environ, DB_WRITER_KEY=os.getenv("DB_WRITER_KEY") or secrets.token_hex(16))
+    writer = start_writer(args.address, args.db, dict(env, LOG_FILE="logs/db_writer.log"))
+    bots = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        wait_for_writer(args.address, env["DB_WRITER_KEY"].encode(), writer)
+        for index, group in enumerate(shard_groups(args.shards, args.processes)):
+            print(f"Starting shard group {index}: shards {group}")
+            bots.append(subprocess.Popen([sys.executable, "bot.py"], cwd=ROOT,
+                                         env=group_env(env, args.shards, group, index, args.address)))
+        while all(process.poll() is None for process in bots + [writer]):
+            time.sleep(1)
+        print("A process exited; shutting the rest down.")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Bots first, so their buffered activity reaches the writer before it closes
+        stop(bots)
+        stop([writer])
+
+
+if __name__ == "__main__":
+    main()
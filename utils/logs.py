@@ -0,0 +1,110 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+
+# LogRecord attributes that aren't user fields
+RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+def parse_settings(text):
+    """Parse "cogs.voiceChat=DEBUG;db.dbcalls=0.1" into {logger name: value}."""
+    settings = {}
+    for part in text.replace(",", ";").split(";"):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            settings[name.strip()] = value.strip()
+    return settings
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any ``extra`` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of DEBUG and INFO records from busy loggers.
+
+    ``rates`` maps a logger name to the fraction kept; child loggers inherit
+    the closest parent's rate. Warnings and errors are never dropped. Kept
+    records carry ``sampled`` so counts can be scaled back up.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self.resolved = {}  # Logger name -> rate, so the parent walk happens once per logger
+
+    def rate(self, name):
+        rate = self.resolved.get(name)
+        if rate is None:
+            rate, prefix = 1.0, name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self.resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate(record.name)
+        if rate >= 1.0:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sampled = rate
+        return True
+
+
+def setup_logging(path="logs/eli_bot.log", level="INFO", levels=None, sample=None,
+                  max_bytes=10 * 1024 * 1024, backups=5, console_level="INFO"):
+    """Route every logger through a queue to a background listener.
+
+    Handlers on the event loop only put records on a queue; the listener
+    thread formats them and does the file and console I/O. The file gets JSON
+    lines and rotates at ``max_bytes``; the console gets plain text at
+    ``console_level``. Returns the started listener, stop it on shutdown to
+    flush what is still queued.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+    console = logging.StreamHandler()
+    console.setLevel(console_level)
+    console.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%Y-%m-%d %H:%M:%S"))
+
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    if sample:
+        handler.addFilter(SamplingFilter({name: float(rate) for name, rate in sample.items()}))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name, name_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(name_level.upper())
+
+    listener = logging.handlers.QueueListener(records, file_handler, console, respect_handler_level=True)
+    listener.start()
+    logging.getLogger(__name__).info(f"Logging to {path}", extra={"pid": os.getpid()})
+    return listener
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(metrics):
+    """Prometheus text format for (name, type, help, samples) entries.
+
+    ``samples`` is a list of (labels dict, value); a metric with no samples
+    is still described, so dashboards can tell "zero" from "not exported".
+    """
+    lines = []
+    for name, kind, description, samples in metrics:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if labels:
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+            else:
+                lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """A minimal HTTP server answering ``GET /metrics`` from the bot's event loop.
+
+    ``collect`` is called for every scrape and must return entries for
+    ``render``. It only reads in-memory counters, so a scrape never waits on
+    the database or Discord. Bind to 127.0.0.1 unless a scraper on another
+    host needs it; there is no authentication.
+    """
+
+    def __init__(self, collect, host="127.0.0.1", port=9108):
+        self.collect = collect
+        self.host = host
+        self.port = port
+        self.server = None
+        self.logger = logging.getLogger(__name__)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.logger.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Skip the headers; nothing in them changes the answer
+            while (await asyncio.wait_for(reader.readline(), timeout=5)).strip():
+                pass
+
+            parts = request.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] not in ("GET", "HEAD"):
+                status, body = "405 Method Not Allowed", "Only GET is supported.\n"
+            elif parts[1].split("?", 1)[0] != "/metrics":
+                status, body = "404 Not Found", "Metrics are served at /metrics.\n"
+            else:
+                status, body = "200 OK", render(self.collect())
+
+            payload = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+            )
+            if parts and parts[0] != "HEAD":
+                writer.write(payload)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            self.logger.error(f"Error serving metrics: {e}")
+        finally:
+            writer.close()
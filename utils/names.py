@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+import discord
+
+
+class NameCache:
+    """Resolve member IDs to display names without a REST call per row.
+
+    Lookups go through the gateway member/user cache, then a bounded LRU with a
+    TTL, then names stored in the Members table. Only what is still missing is
+    fetched from Discord, concurrently, and the results are saved to the
+    database for next time.
+    """
+
+    def __init__(self, bot, maxsize=2048, ttl=3600):
+        self.bot = bot
+        self.maxsize = maxsize
+        self.ttl = ttl  # Seconds a cached name stays valid
+        self.entries = OrderedDict()  # MemberId -> (name, expires_at)
+        self.logger = logging.getLogger(__name__)
+
+        # Where names came from, for tuning maxsize/ttl
+        self.stats = {"gateway": 0, "lru": 0, "db": 0, "rest": 0}
+
+    def _remember(self, member_id, name):
+        self.entries[member_id] = (name, time.monotonic() + self.ttl)
+        self.entries.move_to_end(member_id)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def _cached(self, member_id):
+        entry = self.entries.get(member_id)
+        if entry is None:
+            return None
+        name, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.entries[member_id]
+            return None
+        self.entries.move_to_end(member_id)
+        return name
+
+    def _from_gateway(self, member_id, guild):
+        member = guild.get_member(member_id) if guild else None
+        user = member or self.bot.get_user(member_id)
+        return user.name if user else None
+
+    async def _fetch(self, member_id):
+        try:
+            user = await self.bot.fetch_user(member_id)
+            return user.name
+        except discord.NotFound:
+            self.logger.warning(f"Member {member_id} not found. Assuming user left.")
+            return None
+        except discord.HTTPException as e:
+            self.logger.error(f"Error fetching member {member_id}: {e}")
+            return None
+
+    async def resolve_many(self, member_ids, guild=None):
+        """Return {MemberId: name}. Members Discord no longer knows are labelled as having left."""
+        names = {}
+        missing = []
+        for member_id in member_ids:
+            name = self._from_gateway(member_id, guild)
+            if name:
+                self.stats["gateway"] += 1
+                self._remember(member_id, name)
+            else:
+                name = self._cached(member_id)
+                if name:
+                    self.stats["lru"] += 1
+                else:
+                    missing.append(member_id)
+                    continue
+            names[member_id] = name
+
+        if missing:
+            stored = await self.bot.db.get_member_names(missing)
+            self.stats["db"] += len(stored)
+            for member_id, name in stored.items():
+                self._remember(member_id, name)
+            names.update(stored)
+            missing = [member_id for member_id in missing if member_id not in stored]
+
+        if missing:
+            fetched = await asyncio.gather(*(self._fetch(member_id) for member_id in missing))
+            found = {member_id: name for member_id, name in zip(missing, fetched) if name}
+            self.stats["rest"] += len(missing)
+            for member_id, name in found.items():
+                self._remember(member_id, name)
+            if found:
+                await self.bot.db.set_member_names(found)
+            for member_id in missing:
+                name = found.get(member_id)
+                if name is None:
+                    # Cache the miss too, so a departed member costs one REST call per TTL
+                    name = f"User Left ({member_id})"
+                    self._remember(member_id, name)
+                names[member_id] = name
+
+        return names
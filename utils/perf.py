@@ -0,0 +1,84 @@
+import functools
+import time
+from collections import deque
+
+
+class LatencyWindow:
+    """The most recent latency samples for one command, query or route, plus lifetime totals."""
+
+    def __init__(self, size=2048):
+        self.samples = deque(maxlen=size)  # Milliseconds, oldest dropped first
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+
+    def add(self, ms, failed=False):
+        self.samples.append(ms)
+        self.count += 1
+        self.total += ms
+        if failed:
+            self.errors += 1
+
+    def percentiles(self, *pcts):
+        """Percentiles over the window; sorting only happens when someone asks."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return [0.0 for _ in pcts]
+        return [ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] for pct in pcts]
+
+
+class Perf:
+    """Rolling latency per command, database query and Discord HTTP route.
+
+    Recording is a deque append, so it can stay on in production; percentiles
+    are only computed by ``+perf``. Samples may be recorded from the database
+    thread as well as the event loop.
+    """
+
+    KINDS = ("command", "query", "http")
+
+    def __init__(self, window=2048):
+        self.window = window
+        self.stats = {kind: {} for kind in self.KINDS}
+        self.started = time.time()
+
+    def record(self, kind, name, ms, failed=False):
+        stats = self.stats[kind]
+        entry = stats.get(name)
+        if entry is None:
+            entry = stats.setdefault(name, LatencyWindow(self.window))
+        entry.add(ms, failed)
+
+    def busiest(self, kind, limit=10):
+        """(name, LatencyWindow) for the most-called names of a kind."""
+        return sorted(self.stats[kind].items(), key=lambda item: item[1].count, reverse=True)[:limit]
+
+    def timed(self, kind, name, func):
+        """Wrap a blocking callable so each call is recorded."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self.record(kind, name, (time.perf_counter() - start) * 1000, failed)
+        return wrapper
+
+    def instrument_http(self, http):
+        """Time every request discord.py makes, keyed by route template (not by IDs)."""
+        request = http.request
+
+        async def timed_request(route, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = await request(route, **kwargs)
+                failed = False
+                return result
+            finally:
+                self.record("http", f"{route.method} {route.path}", (time.perf_counter() - start) * 1000, failed)
+
+        http.request = timed_request
@@ -0,0 +1,36 @@
+import math
+from collections import Counter, defaultdict
+
+
+def parse_shard_ids(text):
+    """"0,1,2" -> [0, 1, 2]; empty means every shard."""
+    return [int(part) for part in text.replace(";", ",").split(",") if part.strip()] or None
+
+
+class ShardStats:
+    """Per-shard counters, read by +shards and the metrics endpoint.
+
+    Without sharding everything is counted against shard 0.
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(Counter)  # Shard ID -> {"messages": n, "connects": n, ...}
+
+    def count(self, shard_id, what):
+        self.counts[shard_id or 0][what] += 1
+
+    def rows(self, bot):
+        """(shard ID, latency in s or None, guilds, members, counters) for every shard this process knows."""
+        latencies = dict(getattr(bot, "latencies", None) or [(0, bot.latency)])
+        guilds, members = Counter(), Counter()
+        for guild in bot.guilds:
+            guilds[guild.shard_id or 0] += 1
+            members[guild.shard_id or 0] += guild.member_count or 0
+
+        rows = []
+        for shard_id in sorted(set(latencies) | set(guilds) | set(self.counts)):
+            latency = latencies.get(shard_id)
+            if latency is not None and math.isnan(latency):
+                latency = None
+            rows.append((shard_id, latency, guilds[shard_id], members[shard_id], self.counts[shard_id]))
+        return rows
@@ -0,0 +1,34 @@
+import os
+import time
+
+
+def discover_extensions(directory, package):
+    """Module names of every extension in a directory, found once at startup."""
+    return sorted(f"{package}.{filename[:-3]}" for filename in os.listdir(directory)
+                  if filename.endswith(".py") and not filename.startswith("_"))
+
+
+class StartupTimer:
+    """Time each startup phase, from the first import to the gateway being ready."""
+
+    def __init__(self, started):
+        self.started = started  # time.perf_counter() taken before the heavy imports
+        self.last = started
+        self.phases = []  # (name, seconds)
+        self.details = {}  # Phase -> extra text for the report
+
+    def phase(self, name, detail=None):
+        """Close the phase that has been running since the previous mark."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+        if detail:
+            self.details[name] = detail
+
+    def report(self):
+        total = self.last - self.started
+        lines = [f"Startup took {total:.2f}s"]
+        for name, seconds in self.phases:
+            detail = f" ({self.details[name]})" if name in self.details else ""
+            lines.append(f"  {name:<14} {seconds * 1000:8.1f}ms{detail}")
+        return "\n".join(lines)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+
+from utils.perf import LatencyWindow
+
+# Frames under the repo root are "ours"; the innermost one names a blocking site
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopWatchdog:
+    """Measure event-loop lag and capture what was running when the loop stalls.
+
+    A heartbeat task wakes every ``interval`` seconds and records how late it
+    was. A separate thread watches the heartbeat: once it is more than
+    ``threshold`` seconds overdue, the loop is stuck in synchronous code, so
+    the thread takes the loop thread's stack along with the command or
+    listener that was running. Each stall is captured once and logged; the
+    most recent ``keep`` are kept for ``+lag``.
+    """
+
+    def __init__(self, threshold=0.25, interval=0.05, keep=50):
+        self.threshold = threshold
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+
+        self.lags = LatencyWindow()  # Heartbeat lateness in ms
+        self.stalls = deque(maxlen=keep)
+        self.stall_count = 0
+        self.sites = Counter()  # (label, site) -> stalls
+        self.worst = {}         # (label, site) -> longest stall in ms
+        self.commands = {}      # Task -> command running in it
+
+        self.loop = None
+        self.loop_thread = None
+        self.beat = 0.0
+        self.current = None  # Stall being captured, finished by the next heartbeat
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.heartbeat_task = None
+
+    def start(self):
+        """Start watching the running loop."""
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.beat = time.monotonic()
+        self.stopped.clear()
+        self.heartbeat_task = self.loop.create_task(self._heartbeat(), name="loop-watchdog-heartbeat")
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+
+    def enter(self, command):
+        """Tag the current task with the command it is running."""
+        self.commands[asyncio.current_task()] = command
+
+    def leave(self):
+        self.commands.pop(asyncio.current_task(), None)
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected) * 1000
+            self.lags.add(lag)
+            with self.lock:
+                self.beat = now
+                stall, self.current = self.current, None
+            if stall is not None:
+                # The loop is running again: now we know how long it was stuck
+                stall["lag_ms"] = lag
+                key = (stall["label"], stall["site"])
+                self.worst[key] = max(self.worst.get(key, 0.0), lag)
+
+    def _watch(self):
+        while not self.stopped.wait(self.interval):
+            with self.lock:
+                overdue = time.monotonic() - self.beat - self.interval
+                if overdue < self.threshold or self.current is not None:
+                    continue
+                stall = self.current = self._capture(overdue * 1000)
+            self.logger.warning(
+                f"Event loop blocked for {stall['lag_ms']:.0f}ms+ in {stall['label']} at {stall['site']}\n"
+                + "".join(stall["stack"])
+            )
+
+    def _capture(self, lag):
+        frame = sys._current_frames().get(self.loop_thread)
+        stack = traceback.extract_stack(frame) if frame else []
+        # Drop the event loop's own frames, down to where it called into the task
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index].filename == asyncio.events.__file__:
+                stack = stack[index + 1:]
+                break
+        stack = stack[-20:]
+        task = asyncio.current_task(self.loop)
+        if task is None:
+            label = "callback"
+        else:
+            label = self.commands.get(task) or task.get_name()
+
+        site = "unknown"
+        for entry in reversed(stack):
+            path = os.path.abspath(entry.filename)
+            if path.startswith(ROOT) and path != os.path.abspath(__file__):
+                site = f"{os.path.relpath(path, ROOT)}:{entry.lineno} in {entry.name}"
+                break
+
+        stall = {"at": time.time(), "lag_ms": lag, "label": label, "site": site,
+                 "stack": traceback.format_list(stack)}
+        self.stalls.append(stall)
+        self.stall_count += 1
+        self.sites[(label, site)] += 1
+        self.worst[(label, site)] = max(self.worst.get((label, site), 0.0), lag)
+        return stall